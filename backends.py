@@ -0,0 +1,245 @@
+"""
+Backends de traducción
+Interfaz común para los servicios de traducción que usa TraductorSRT:
+Google Translate (vía deep_translator) y un backend simulado sin red
+para pruebas y mediciones reproducibles
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+
+
+logger = logging.getLogger('traductor_srt')
+
+# Sin langdetect no se detecta el idioma origen: se avisa una vez por proceso
+_aviso_langdetect = False
+
+
+class ErrorBackend(Exception):
+    """Error genérico devuelto por un backend de traducción."""
+    # Los errores transitorios se reintentan; el resto no mejora repitiendo la petición
+    transitorio = False
+
+
+class ErrorLimiteTasa(ErrorBackend):
+    """El servicio rechaza la petición por exceso de peticiones (HTTP 429)."""
+    transitorio = True
+
+
+class ErrorConexion(ErrorBackend):
+    """Fallo de red o del servidor; la misma petición puede funcionar más tarde."""
+    transitorio = True
+
+
+class ErrorTextoInvalido(ErrorBackend):
+    """El servicio no acepta el texto (vacío, demasiado largo...)."""
+
+
+class BackendTraduccion:
+    nombre = 'base'
+    # Máximo de caracteres que acepta el servicio en una sola petición
+    max_caracteres = 5000
+
+    def traducir(self, texto, origen, destino):
+        raise NotImplementedError
+
+    # Marcador numerado entre los textos de un lote; los números entre
+    # corchetes sobreviven a la traducción y permiten verificar la alineación
+    SEPARADOR_LOTE = '\n[{}]\n'
+    PATRON_SEPARADOR = re.compile(r'\s*\[\s*(\d+)\s*\]\s*')
+
+    def traducir_varios(self, textos, origen, destino):
+        """Traduce varios textos en una sola petición.
+
+        Devuelve las traducciones en el mismo orden, o None si la respuesta no
+        se puede repartir entre los textos. Por defecto los une con marcadores
+        numerados en un solo texto; un servicio con traducción por lotes
+        propia puede sustituirlo.
+        """
+        if len(textos) == 1:
+            return [self.traducir(textos[0], origen, destino)]
+        texto = ''.join(self.SEPARADOR_LOTE.format(n) + texto for n, texto in enumerate(textos))
+        return self.separar_lote(self.traducir(texto, origen, destino) or '', len(textos))
+
+    def separar_lote(self, traduccion, cantidad):
+        """Divide la traducción de un lote por sus marcadores.
+
+        Devuelve None si los marcadores no llegan completos y en orden.
+        """
+        partes = self.PATRON_SEPARADOR.split(traduccion)
+        # split con un grupo devuelve [antes, n0, texto0, n1, texto1, ...]
+        if partes[0].strip():
+            return None
+        numeros = partes[1::2]
+        textos = partes[2::2]
+        if numeros != [str(n) for n in range(cantidad)]:
+            return None
+        return [texto.strip() for texto in textos]
+
+    def normalizar_idioma(self, codigo):
+        """Código que entiende el servicio para un idioma detectado, o None si
+        no lo admite."""
+        return codigo
+
+    def detectar(self, texto):
+        """Código del idioma del texto, o None si no se puede determinar.
+
+        Por defecto se detecta en local con langdetect, sin gastar peticiones
+        al servicio.
+        """
+        global _aviso_langdetect
+        try:
+            import langdetect
+        except ImportError:
+            if not _aviso_langdetect:
+                _aviso_langdetect = True
+                logger.warning("langdetect no está instalado: no se detecta el idioma origen "
+                               "(pip install langdetect)")
+            return None
+        # Semilla fija: langdetect es aleatorio y el mismo archivo debe dar siempre el
+        # mismo idioma (la cache y el diario de progreso dependen de él)
+        langdetect.DetectorFactory.seed = 0
+        try:
+            return langdetect.detect(texto)
+        except langdetect.LangDetectException:
+            return None
+
+
+class BackendGoogle(BackendTraduccion):
+    nombre = 'google'
+    max_caracteres = 5000
+    # Códigos de langdetect que Google escribe de otra forma
+    ALIAS_IDIOMAS = {'he': 'iw'}
+
+    def __init__(self, proxies=None, transporte=None):
+        # Importación diferida: el resto del programa funciona sin deep_translator
+        from deep_translator import GoogleTranslator
+        from deep_translator import exceptions
+        from deep_translator.constants import GOOGLE_LANGUAGES_TO_CODES
+        from transporte import instalar_en_deep_translator, transporte_compartido
+
+        self._clase_traductor = GoogleTranslator
+        self._excepciones = exceptions
+        # 'zh-cn' -> 'zh-CN': langdetect devuelve los códigos en minúsculas
+        self._codigos = {codigo.lower(): codigo for codigo in GOOGLE_LANGUAGES_TO_CODES.values()}
+        self.proxies = proxies
+        # Todas las instancias y los hilos del proceso comparten las conexiones
+        self.transporte = transporte if transporte is not None else transporte_compartido()
+        instalar_en_deep_translator(self.transporte)
+        # GoogleTranslator guarda los parámetros de la petición en la instancia,
+        # así que cada hilo necesita su propio traductor
+        self._local = threading.local()
+
+    def normalizar_idioma(self, codigo):
+        codigo = codigo.lower()
+        codigo = self.ALIAS_IDIOMAS.get(codigo, codigo)
+        if codigo in self._codigos:
+            return self._codigos[codigo]
+        # 'pt-br' -> 'pt'
+        return self._codigos.get(codigo.split('-')[0])
+
+    def _traductor(self, origen, destino):
+        traductores = getattr(self._local, 'traductores', None)
+        if traductores is None:
+            traductores = self._local.traductores = {}
+        traductor = traductores.get((origen, destino))
+        if traductor is None:
+            traductor = self._clase_traductor(source=origen, target=destino, proxies=self.proxies)
+            traductores[(origen, destino)] = traductor
+        return traductor
+
+    def traducir(self, texto, origen, destino):
+        excepciones = self._excepciones
+        try:
+            return self._traductor(origen, destino).translate(texto)
+        except excepciones.TooManyRequests as e:
+            raise ErrorLimiteTasa(str(e)) from e
+        except (excepciones.NotValidPayload, excepciones.NotValidLength) as e:
+            raise ErrorTextoInvalido(str(e)) from e
+        except (excepciones.RequestError, excepciones.TranslationNotFound, OSError) as e:
+            # requests.RequestException hereda de OSError
+            raise ErrorConexion(str(e)) from e
+        except Exception as e:
+            raise ErrorBackend(str(e)) from e
+
+
+class BackendSimulado(BackendTraduccion):
+    """Backend local que imita un servicio remoto.
+
+    Traduce anteponiendo el código de destino a cada línea (respetando los
+    marcadores de lote) y permite configurar latencia, límite de peticiones
+    por segundo y fallos aleatorios. Con la misma semilla se comporta igual
+    en cada ejecución.
+    """
+    nombre = 'simulado'
+    PATRON_MARCADOR = re.compile(r'^\s*\[\s*\d+\s*\]\s*$')
+
+    def __init__(self, latencia=0.05, variacion_latencia=0.0, max_peticiones_segundo=None,
+                 prob_fallo=0.0, prob_limite=0.0, prob_desalineacion=0.0,
+                 max_caracteres=5000, idioma_detectado=None, semilla=None):
+        self.latencia = latencia
+        self.variacion_latencia = variacion_latencia
+        self.max_peticiones_segundo = max_peticiones_segundo
+        self.prob_fallo = prob_fallo
+        self.prob_limite = prob_limite
+        self.prob_desalineacion = prob_desalineacion
+        self.max_caracteres = max_caracteres
+        self.idioma_detectado = idioma_detectado
+        self.peticiones = 0
+        self.caracteres = 0
+        self.errores = 0
+        self._aleatorio = random.Random(semilla)
+        self._recientes = deque()
+        self._lock = threading.Lock()
+
+    def detectar(self, texto):
+        if self.idioma_detectado is not None:
+            return self.idioma_detectado
+        return super().detectar(texto)
+
+    def traducir_linea(self, linea, destino):
+        if not linea.strip() or self.PATRON_MARCADOR.match(linea):
+            return linea
+        return f"{destino}: {linea}"
+
+    def traducir(self, texto, origen, destino):
+        with self._lock:
+            self.peticiones += 1
+            self.caracteres += len(texto)
+            ahora = time.monotonic()
+            while self._recientes and ahora - self._recientes[0] > 1.0:
+                self._recientes.popleft()
+            self._recientes.append(ahora)
+            saturado = (self.max_peticiones_segundo is not None
+                        and len(self._recientes) > self.max_peticiones_segundo)
+            sorteo = self._aleatorio.random()
+            espera = self.latencia + self._aleatorio.uniform(0, self.variacion_latencia)
+            desalinear = self._aleatorio.random() < self.prob_desalineacion
+
+        time.sleep(espera)
+
+        if len(texto) > self.max_caracteres:
+            self._contar_error()
+            raise ErrorTextoInvalido(f"Texto de {len(texto)} caracteres, máximo {self.max_caracteres}")
+        if saturado or sorteo < self.prob_limite:
+            self._contar_error()
+            raise ErrorLimiteTasa("Demasiadas peticiones (simulado)")
+        if sorteo < self.prob_limite + self.prob_fallo:
+            self._contar_error()
+            raise ErrorConexion("Fallo de conexión (simulado)")
+
+        lineas = texto.strip().split('\n')
+        if desalinear:
+            # Imita al servicio que se come un marcador de lote
+            marcadores = [i for i, linea in enumerate(lineas) if self.PATRON_MARCADOR.match(linea)]
+            if marcadores:
+                del lineas[marcadores[-1]]
+        return '\n'.join(self.traducir_linea(linea, destino) for linea in lineas)
+
+    def _contar_error(self):
+        with self._lock:
+            self.errores += 1
@@ -0,0 +1,355 @@
+"""
+Benchmark del traductor de subtítulos
+Genera archivos SRT sintéticos y mide el parseo, la traducción completa contra
+un backend simulado (sin red), la memoria máxima y las peticiones por archivo.
+Los resultados se emiten en JSON para poder compararlos entre versiones.
+
+Uso:
+    python benchmark.py
+    python benchmark.py --subtitulos 5000 --latencia 0.1 --salida resultados.json
+"""
+
+import argparse
+import http.server
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from backends import BackendSimulado
+from formato_srt import iterar_srt, ms_a_tiempo
+from limitador_tasa import LimitadorTasa
+from metricas import Metricas
+from planificador import PlanificadorTraduccion
+from traductor_srt import TraductorSRT
+from transporte import TransporteHTTP
+
+
+PALABRAS = (
+    "the of and to in is you that it he was for on are as with his they at be this "
+    "have from or one had by word but not what all were we when your can said there "
+    "use an each which she do how their if will up other about out many then them "
+    "these so some her would make like him into time has look two more write go see"
+).split()
+
+
+def generar_srt_sintetico(subtitulos=1000, longitud_linea=40, tasa_repeticion=0.2,
+                          tasa_malformados=0.0, tasa_continuacion=0.15, semilla=0):
+    """Devuelve el contenido de un SRT sintético.
+
+    tasa_repeticion: fracción de subtítulos que repiten un texto anterior.
+    tasa_malformados: fracción de bloques con la marca de tiempo rota.
+    tasa_continuacion: fracción de textos sin puntuación final, cuya frase
+    sigue en el subtítulo siguiente.
+    """
+    aleatorio = random.Random(semilla)
+    textos = []
+    partes = []
+    inicio = 0
+
+    for numero in range(1, subtitulos + 1):
+        if textos and aleatorio.random() < tasa_repeticion:
+            texto = aleatorio.choice(textos)
+        else:
+            lineas = []
+            for _ in range(aleatorio.choice((1, 1, 2))):
+                linea = []
+                while sum(len(p) + 1 for p in linea) < longitud_linea:
+                    linea.append(aleatorio.choice(PALABRAS))
+                lineas.append(' '.join(linea).capitalize())
+            texto = '\n'.join(lineas)
+            if aleatorio.random() >= tasa_continuacion:
+                texto += aleatorio.choice(('.', '.', '.', '?', '!'))
+            textos.append(texto)
+
+        duracion = aleatorio.randint(800, 4000)
+        if aleatorio.random() < tasa_malformados:
+            tiempo = f"{ms_a_tiempo(inicio)} -> roto"
+        else:
+            tiempo = f"{ms_a_tiempo(inicio)} --> {ms_a_tiempo(inicio + duracion)}"
+        partes.append(f"{numero}\n{tiempo}\n{texto}\n\n")
+        inicio += duracion + aleatorio.randint(50, 1500)
+
+    return ''.join(partes)
+
+
+def medir_parseo(contenido, repeticiones=3):
+    mejores = []
+    for _ in range(repeticiones):
+        errores = []
+        inicio = time.perf_counter()
+        cantidad = sum(1 for _ in iterar_srt(io.StringIO(contenido), errores))
+        mejores.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    lista = list(iterar_srt(io.StringIO(contenido)))
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del lista
+
+    segundos = min(mejores)
+    tamano = len(contenido.encode('utf-8'))
+    return {
+        'subtitulos': cantidad,
+        'bloques_mal_formados': len(errores),
+        'bytes': tamano,
+        'segundos': segundos,
+        'mb_por_segundo': tamano / segundos / 1e6 if segundos else None,
+        'memoria_pico_bytes': pico,
+    }
+
+
+def medir_traduccion(rutas, latencia, hilos, tasa, usar_lotes, semilla):
+    backend = BackendSimulado(latencia=latencia, semilla=semilla)
+    limitador = LimitadorTasa(tasa=tasa)
+    metricas = Metricas()
+    por_archivo = []
+    total_subtitulos = 0
+
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    # Un traductor por archivo, uno detrás de otro, como cada proceso de la línea de comandos
+    for ruta in rutas:
+        peticiones_antes = backend.peticiones
+        traductor = TraductorSRT(idioma_origen='en', idioma_destino='es', backend=backend,
+                                 limitador=limitador, hilos=hilos, usar_lotes=usar_lotes,
+                                 metricas=metricas)
+        inicio_archivo = time.perf_counter()
+        traductor.traducir_archivo(ruta, ruta + '.out')
+        with open(ruta, encoding='utf-8') as f:
+            subtitulos = sum(1 for _ in iterar_srt(f))
+        total_subtitulos += subtitulos
+        por_archivo.append({
+            'subtitulos': subtitulos,
+            'peticiones': backend.peticiones - peticiones_antes,
+            'segundos': time.perf_counter() - inicio_archivo,
+        })
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'archivos': len(rutas),
+        'subtitulos': total_subtitulos,
+        'segundos': segundos,
+        'subtitulos_por_segundo': total_subtitulos / segundos if segundos else None,
+        'peticiones': backend.peticiones,
+        'peticiones_por_archivo': backend.peticiones / len(rutas),
+        'caracteres_enviados': backend.caracteres,
+        'memoria_pico_bytes': pico,
+        'por_archivo': por_archivo,
+        'metricas': metricas.resumen(),
+    }
+
+
+def medir_planificador(rutas, latencia, hilos, tasa, usar_lotes, semilla):
+    # Mismo recorrido que AplicacionTraductor.traducir: todos los archivos de la
+    # tanda comparten los hilos a través de PlanificadorTraduccion
+    backend = BackendSimulado(latencia=latencia, semilla=semilla)
+    traductor = TraductorSRT(idioma_origen='en', idioma_destino='es', backend=backend,
+                             limitador=LimitadorTasa(tasa=tasa), hilos=hilos,
+                             usar_lotes=usar_lotes)
+    planificador = PlanificadorTraduccion(traductor)
+    for ruta in rutas:
+        planificador.agregar(ruta, ruta + '.planificador.out')
+
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultados = planificador.ejecutar()
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total_subtitulos = sum(traductor.total_subtitulos for traductor in planificador.traductores.values())
+    return {
+        'archivos': len(rutas),
+        'fallidos': sum(1 for resultado in resultados.values() if isinstance(resultado, Exception)),
+        'subtitulos': total_subtitulos,
+        'segundos': segundos,
+        'subtitulos_por_segundo': total_subtitulos / segundos if segundos else None,
+        'peticiones': backend.peticiones,
+        'peticiones_por_archivo': backend.peticiones / len(rutas),
+        'memoria_pico_bytes': pico,
+    }
+
+
+class _ServidorLocal(http.server.ThreadingHTTPServer):
+    # Sustituto local del servicio: cuenta las conexiones TCP que recibe
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _ManejadorLocal)
+        self.conexiones = 0
+        self.peticiones = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/m"
+
+
+class _ManejadorLocal(http.server.BaseHTTPRequestHandler):
+    # HTTP/1.1: la conexión queda abierta para las siguientes peticiones
+    protocol_version = 'HTTP/1.1'
+    # Cabeceras y cuerpo van en escrituras separadas: sin esto, Nagle y el ACK
+    # retrasado añaden ~40 ms a cada respuesta sobre una conexión reutilizada
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server._lock:
+            self.server.conexiones += 1
+
+    def do_GET(self):
+        with self.server._lock:
+            self.server.peticiones += 1
+        cuerpo = b'<div class="t0">ok</div>'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+def medir_transporte(peticiones, hilos, tamano_pool):
+    """Peticiones contra un servidor local con el transporte compartido y con
+    una conexión nueva por petición (lo que hace deep_translator por sí solo)."""
+    try:
+        import requests
+    except ImportError:
+        return {'omitido': 'requests no está instalado'}
+
+    def medir(get):
+        servidor = _ServidorLocal()
+        hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+        hilo.start()
+        try:
+            def peticion(_):
+                respuesta = get(servidor.url, params={'q': 'hello'})
+                respuesta.text
+                respuesta.close()
+
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=hilos) as executor:
+                list(executor.map(peticion, range(peticiones)))
+            segundos = time.perf_counter() - inicio
+        finally:
+            servidor.shutdown()
+            servidor.server_close()
+        return {
+            'peticiones': servidor.peticiones,
+            'conexiones': servidor.conexiones,
+            'segundos': segundos,
+            'ms_por_peticion': segundos / peticiones * 1000 * hilos if peticiones else None,
+        }
+
+    transporte = TransporteHTTP(tamano_pool=tamano_pool)
+    try:
+        compartido = medir(transporte.get)
+    finally:
+        transporte.cerrar()
+    return {
+        'transporte_compartido': compartido,
+        'conexion_por_peticion': medir(requests.get),
+        # El pool limita las conexiones por sí solo; lo que mide la reutilización
+        # es cuántas peticiones viajan por cada una
+        'peticiones_por_conexion': (compartido['peticiones'] / compartido['conexiones']
+                                    if compartido['conexiones'] else None),
+    }
+
+
+def version_codigo():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ejecutar(args):
+    contenido = generar_srt_sintetico(
+        subtitulos=args.subtitulos,
+        longitud_linea=args.longitud_linea,
+        tasa_repeticion=args.repeticion,
+        tasa_malformados=args.malformados,
+        semilla=args.semilla,
+    )
+
+    resultados = {
+        'version': version_codigo(),
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'parametros': vars(args),
+        'parseo': medir_parseo(contenido),
+    }
+
+    with tempfile.TemporaryDirectory() as directorio:
+        rutas = []
+        for n in range(args.archivos):
+            ruta = os.path.join(directorio, f"episodio_{n:03d}.srt")
+            with open(ruta, 'w', encoding='utf-8') as f:
+                f.write(contenido if n == 0 else generar_srt_sintetico(
+                    subtitulos=args.subtitulos,
+                    longitud_linea=args.longitud_linea,
+                    tasa_repeticion=args.repeticion,
+                    tasa_malformados=args.malformados,
+                    semilla=args.semilla + n,
+                ))
+            rutas.append(ruta)
+
+        resultados['traduccion'] = medir_traduccion(
+            rutas, args.latencia, args.hilos, args.tasa, not args.sin_lotes, args.semilla
+        )
+        resultados['planificador'] = medir_planificador(
+            rutas, args.latencia, args.hilos, args.tasa, not args.sin_lotes, args.semilla
+        )
+
+    if args.peticiones_http:
+        resultados['transporte'] = medir_transporte(args.peticiones_http, args.hilos, args.hilos)
+
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del traductor de subtítulos SRT")
+    parser.add_argument('--subtitulos', type=int, default=1500, help="subtítulos por archivo")
+    parser.add_argument('--archivos', type=int, default=1, help="archivos a traducir")
+    parser.add_argument('--longitud-linea', type=int, default=40, help="caracteres por línea")
+    parser.add_argument('--repeticion', type=float, default=0.2, help="fracción de textos repetidos")
+    parser.add_argument('--malformados', type=float, default=0.0, help="fracción de bloques rotos")
+    parser.add_argument('--latencia', type=float, default=0.05, help="latencia simulada por petición (s)")
+    parser.add_argument('--hilos', type=int, default=4)
+    parser.add_argument('--tasa', type=float, default=20.0, help="peticiones por segundo permitidas")
+    parser.add_argument('--sin-lotes', action='store_true', help="una petición por subtítulo")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--peticiones-http', type=int, default=200,
+                        help="peticiones contra un servidor HTTP local para medir la reutilización "
+                             "de conexiones (0 para omitirlo)")
+    parser.add_argument('--salida', help="archivo JSON de resultados (por defecto, salida estándar)")
+    args = parser.parse_args()
+
+    resultados = ejecutar(args)
+    texto = json.dumps(resultados, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            f.write(texto + '\n')
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Cache persistente de traducciones en SQLite
+Evita volver a pedir al traductor subtítulos ya traducidos en ejecuciones anteriores,
+tanto los idénticos como los casi iguales (memoria de traducción aproximada)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from memoria_traduccion import adaptar, analizar
+
+
+RUTA_CACHE_PREDETERMINADA = os.path.join(os.path.expanduser('~'), '.traductor_subtitulos', 'cache.sqlite3')
+
+
+def normalizar_texto(texto):
+    # Espacios sobrantes no cambian la traducción, los saltos de línea sí
+    lineas = (' '.join(linea.split()) for linea in texto.strip().splitlines())
+    return '\n'.join(linea for linea in lineas if linea)
+
+
+class CacheTraducciones:
+    # Cada cuántas escrituras se revisa si hay que desalojar entradas
+    INTERVALO_DESALOJO = 500
+    # Textos con la misma forma canónica que se prueban como mucho en cada búsqueda aproximada
+    MAX_CANDIDATOS_SIMILARES = 20
+
+    def __init__(self, ruta=RUTA_CACHE_PREDETERMINADA, max_entradas=200000, max_edad_dias=None):
+        self.ruta = ruta
+        self.max_entradas = max_entradas
+        self.max_edad_dias = max_edad_dias
+        self.aciertos = 0
+        self.fallos = 0
+        self.aciertos_similares = 0
+        self._escrituras = 0
+        self._lock = threading.Lock()
+        # sqlite3 no permite compartir una conexión entre hilos: una por hilo
+        self._local = threading.local()
+
+        directorio = os.path.dirname(os.path.abspath(ruta))
+        os.makedirs(directorio, exist_ok=True)
+
+        conexion = self._conexion()
+        with conexion:
+            conexion.execute(
+                'CREATE TABLE IF NOT EXISTS traducciones ('
+                ' origen TEXT NOT NULL,'
+                ' destino TEXT NOT NULL,'
+                ' texto TEXT NOT NULL,'
+                ' traduccion TEXT NOT NULL,'
+                ' accedido REAL NOT NULL,'
+                ' PRIMARY KEY (origen, destino, texto))'
+            )
+            conexion.execute(
+                'CREATE INDEX IF NOT EXISTS idx_traducciones_accedido ON traducciones (accedido)'
+            )
+            # Índice de la memoria aproximada: forma canónica de cada texto
+            conexion.execute(
+                'CREATE TABLE IF NOT EXISTS canonicas ('
+                ' origen TEXT NOT NULL,'
+                ' destino TEXT NOT NULL,'
+                ' canonica TEXT NOT NULL,'
+                ' texto TEXT NOT NULL,'
+                ' PRIMARY KEY (origen, destino, canonica, texto)) WITHOUT ROWID'
+            )
+            # Claves MinHash de versiones anteriores, ya sin uso
+            conexion.execute('DROP TABLE IF EXISTS memoria')
+        self.desalojar()
+
+    def _conexion(self):
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None:
+            # timeout alto para que varios procesos puedan esperar al bloqueo de escritura
+            conexion = sqlite3.connect(self.ruta, timeout=30)
+            # WAL permite lecturas concurrentes mientras otro proceso escribe
+            conexion.execute('PRAGMA journal_mode=WAL')
+            conexion.execute('PRAGMA synchronous=NORMAL')
+            self._local.conexion = conexion
+        return conexion
+
+    def obtener(self, origen, destino, texto):
+        clave = (origen, destino, normalizar_texto(texto))
+        conexion = self._conexion()
+        fila = conexion.execute(
+            'SELECT traduccion FROM traducciones WHERE origen = ? AND destino = ? AND texto = ?',
+            clave
+        ).fetchone()
+
+        with self._lock:
+            if fila is None:
+                self.fallos += 1
+            else:
+                self.aciertos += 1
+
+        if fila is None:
+            return None
+
+        with conexion:
+            conexion.execute(
+                'UPDATE traducciones SET accedido = ? WHERE origen = ? AND destino = ? AND texto = ?',
+                (time.time(),) + clave
+            )
+        return fila[0]
+
+    def buscar_similar(self, origen, destino, texto):
+        """Traducción adaptada de un texto guardado con la misma forma canónica
+        que texto (solo cambian números, nombres, puntuación o mayúsculas), o None."""
+        canonica, _ = analizar(texto)
+        if not canonica:
+            return None
+        # Primero los usados más recientemente
+        filas = self._conexion().execute(
+            'SELECT c.texto, t.traduccion FROM canonicas c'
+            ' JOIN traducciones t ON t.origen = c.origen AND t.destino = c.destino AND t.texto = c.texto'
+            ' WHERE c.origen = ? AND c.destino = ? AND c.canonica = ?'
+            ' ORDER BY t.accedido DESC LIMIT ?',
+            (origen, destino, canonica, self.MAX_CANDIDATOS_SIMILARES)
+        ).fetchall()
+        
+        for original, traduccion in filas:
+            adaptada = adaptar(original, traduccion, texto)
+            if adaptada is not None:
+                with self._lock:
+                    self.aciertos_similares += 1
+                return adaptada
+        return None
+    
+    def guardar(self, origen, destino, texto, traduccion):
+        conexion = self._conexion()
+        texto = normalizar_texto(texto)
+        canonica, _ = analizar(texto)
+        with conexion:
+            conexion.execute(
+                'INSERT OR REPLACE INTO traducciones (origen, destino, texto, traduccion, accedido)'
+                ' VALUES (?, ?, ?, ?, ?)',
+                (origen, destino, texto, traduccion, time.time())
+            )
+            if canonica:
+                conexion.execute(
+                    'INSERT OR IGNORE INTO canonicas (origen, destino, canonica, texto) VALUES (?, ?, ?, ?)',
+                    (origen, destino, canonica, texto)
+                )
+
+        with self._lock:
+            self._escrituras += 1
+            desalojar = self._escrituras % self.INTERVALO_DESALOJO == 0
+        if desalojar:
+            self.desalojar()
+
+    def desalojar(self):
+        conexion = self._conexion()
+        eliminadas = 0
+        with conexion:
+            if self.max_edad_dias is not None:
+                limite = time.time() - self.max_edad_dias * 86400
+                eliminadas += self._eliminar(conexion, conexion.execute(
+                    'SELECT origen, destino, texto FROM traducciones WHERE accedido < ?', (limite,)
+                ).fetchall())
+
+            if self.max_entradas is not None:
+                # Eliminar las entradas usadas hace más tiempo (LRU)
+                eliminadas += self._eliminar(conexion, conexion.execute(
+                    'SELECT origen, destino, texto FROM traducciones'
+                    ' ORDER BY accedido DESC LIMIT -1 OFFSET ?',
+                    (self.max_entradas,)
+                ).fetchall())
+        return eliminadas
+
+    def _eliminar(self, conexion, claves):
+        # Borra las entradas y su forma canónica por clave primaria, sin recorrer
+        # el índice de la memoria aproximada entero
+        conexion.executemany(
+            'DELETE FROM traducciones WHERE origen = ? AND destino = ? AND texto = ?', claves
+        )
+        conexion.executemany(
+            'DELETE FROM canonicas WHERE origen = ? AND destino = ? AND canonica = ? AND texto = ?',
+            [(origen, destino, analizar(texto)[0], texto) for origen, destino, texto in claves]
+        )
+        return len(claves)
+
+    def __len__(self):
+        return self._conexion().execute('SELECT COUNT(*) FROM traducciones').fetchone()[0]
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+                'aciertos_similares': self.aciertos_similares,
+            }
+
+    def cerrar(self):
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is not None:
+            conexion.close()
+            self._local.conexion = None
@@ -0,0 +1,85 @@
+"""
+Diario de progreso para reanudar traducciones interrumpidas
+Cada subtítulo traducido se añade como una línea JSON en cuanto termina; si el
+proceso muere, la siguiente ejecución recupera esas traducciones en lugar de
+volver a pedirlas al backend
+"""
+
+import json
+import os
+import zlib
+
+
+def _huella(texto):
+    return zlib.crc32(texto.encode('utf-8'))
+
+
+class DiarioProgreso:
+    def __init__(self, ruta, origen, destino):
+        self.ruta = ruta
+        self.origen = origen
+        self.destino = destino
+        self._archivo = None
+        # Solo se sigue escribiendo en un diario previo si es del mismo trabajo
+        self._reutilizable = False
+
+    def cargar(self, textos):
+        """Devuelve {índice: traducción} de las entradas que siguen siendo válidas.
+
+        Una entrada solo se reutiliza si el texto original del subtítulo no ha
+        cambiado; las líneas incompletas (escritura cortada) se ignoran.
+        """
+        recuperadas = {}
+        if not os.path.exists(self.ruta):
+            return recuperadas
+
+        with open(self.ruta, 'r', encoding='utf-8') as f:
+            cabecera = None
+            for linea in f:
+                try:
+                    registro = json.loads(linea)
+                except ValueError:
+                    continue
+                if cabecera is None:
+                    cabecera = registro
+                    if (cabecera.get('origen'), cabecera.get('destino')) != (self.origen, self.destino):
+                        return recuperadas
+                    self._reutilizable = True
+                    continue
+                indice = registro.get('i')
+                if (isinstance(indice, int) and 0 <= indice < len(textos)
+                        and registro.get('h') == _huella(textos[indice])):
+                    recuperadas[indice] = registro['t']
+
+        return recuperadas
+
+    def abrir(self):
+        if self._reutilizable:
+            with open(self.ruta, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                cortado = f.read(1) != b'\n'
+            self._archivo = open(self.ruta, 'a', encoding='utf-8')
+            if cortado:
+                # Terminar la línea que quedó a medias para no pegarle el siguiente registro
+                self._archivo.write('\n')
+        else:
+            self._archivo = open(self.ruta, 'w', encoding='utf-8')
+            self._escribir({'origen': self.origen, 'destino': self.destino})
+
+    def registrar(self, indice, original, traduccion):
+        self._escribir({'i': indice, 'h': _huella(original), 't': traduccion})
+
+    def _escribir(self, registro):
+        self._archivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+        # flush por registro: si el proceso muere, lo escrito queda en disco
+        self._archivo.flush()
+
+    def cerrar(self):
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+
+    def eliminar(self):
+        self.cerrar()
+        if os.path.exists(self.ruta):
+            os.remove(self.ruta)
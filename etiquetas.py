@@ -0,0 +1,90 @@
+"""
+Etiquetas de formato dentro de los subtítulos
+Quita las etiquetas (<i>, <b>, <u>, <font ...> y las de estilo ASS como {\\an8})
+antes de traducir y las vuelve a poner en la traducción en la posición
+equivalente, para que el traductor no las reciba ni las estropee y el mismo
+texto con y sin cursiva comparta la cache
+"""
+
+import re
+
+
+PATRON_ETIQUETA = re.compile(r'</?(?:i|b|u|s|font)(?:\s[^>]*)?>|\{\\[^}]*\}', re.IGNORECASE)
+
+
+def enmascarar(texto):
+    """Devuelve (texto sin etiquetas, marcas) para restaurar() después.
+
+    Cada marca es (línea, fracción, etiqueta): la posición de la etiqueta
+    relativa a la longitud de su línea ya limpia, que es lo que se conserva
+    cuando la traducción tiene otra longitud.
+    """
+    if '<' not in texto and '{' not in texto:
+        return texto, []
+
+    lineas = []
+    marcas = []
+    for n, linea in enumerate(texto.split('\n')):
+        partes = []
+        posiciones = []
+        ultimo = 0
+        for coincidencia in PATRON_ETIQUETA.finditer(linea):
+            partes.append(linea[ultimo:coincidencia.start()])
+            posiciones.append((sum(len(parte) for parte in partes), coincidencia.group()))
+            ultimo = coincidencia.end()
+        partes.append(linea[ultimo:])
+        limpia = ''.join(partes)
+
+        # Los espacios que quedaban junto a las etiquetas de los extremos sobran
+        sin_izquierda = limpia.lstrip()
+        recorte = len(limpia) - len(sin_izquierda)
+        limpia = sin_izquierda.rstrip()
+        for posicion, etiqueta in posiciones:
+            posicion = min(max(posicion - recorte, 0), len(limpia))
+            fraccion = posicion / len(limpia) if limpia else 0.0
+            marcas.append((n, fraccion, etiqueta))
+        lineas.append(limpia)
+
+    return '\n'.join(lineas), marcas
+
+
+def _ajustar_a_palabra(linea, posicion, cierre):
+    # Una etiqueta en mitad de la línea va al borde de palabra más cercano:
+    # al principio de una palabra si abre y al final si cierra
+    if posicion <= 0 or posicion >= len(linea):
+        return posicion
+    bordes = [0, len(linea)]
+    for j in range(1, len(linea)):
+        if cierre and not linea[j - 1].isspace() and linea[j].isspace():
+            bordes.append(j)
+        elif not cierre and linea[j - 1].isspace() and not linea[j].isspace():
+            bordes.append(j)
+    return min(bordes, key=lambda borde: abs(borde - posicion))
+
+
+def restaurar(traduccion, marcas):
+    """Vuelve a poner en la traducción las etiquetas quitadas por enmascarar()."""
+    if not marcas:
+        return traduccion
+
+    lineas = traduccion.split('\n')
+    inserciones = [[] for _ in lineas]
+    for orden, (n, fraccion, etiqueta) in enumerate(marcas):
+        # Si la traducción tiene menos líneas, las etiquetas sobrantes van a la última
+        n = min(n, len(lineas) - 1)
+        linea = lineas[n]
+        posicion = round(fraccion * len(linea))
+        posicion = _ajustar_a_palabra(linea, posicion, etiqueta.startswith('</'))
+        inserciones[n].append((posicion, orden, etiqueta))
+
+    resultado = []
+    for linea, etiquetas in zip(lineas, inserciones):
+        partes = []
+        ultimo = 0
+        for posicion, _, etiqueta in sorted(etiquetas):
+            partes.append(linea[ultimo:posicion])
+            partes.append(etiqueta)
+            ultimo = posicion
+        partes.append(linea[ultimo:])
+        resultado.append(''.join(partes))
+    return '\n'.join(resultado)
@@ -0,0 +1,268 @@
+"""
+Lectura y escritura de archivos SRT
+Parser línea a línea: recorre el archivo una sola vez y entrega cada subtítulo
+en cuanto termina su bloque, sin cargar el archivo completo en memoria
+"""
+
+import codecs
+import io
+import os
+import re
+import stat
+import tempfile
+
+
+# Bytes del principio del archivo con los que se decide la codificación
+TAMANO_MUESTRA = 8192
+
+# umask del proceso, leída una vez al importar: os.umask solo se puede
+# consultar cambiándola, y hacerlo con hilos escribiendo no es seguro
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+# Punto tras un \r que no va seguido de \n: final de línea solo con \r (Mac clásico)
+PATRON_CR_SUELTO = re.compile(r'(?<=\r)(?!\n)')
+PATRON_NUMERO = re.compile(r'^\s*(\d+)\s*$')
+PATRON_TIEMPO = re.compile(
+    r'^\s*(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})\s*-->\s*(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})'
+)
+
+
+def _a_ms(horas, minutos, segundos, milisegundos):
+    # '5' en la parte decimal son 500 ms, no 5 ms
+    return (int(horas) * 3600000 + int(minutos) * 60000 + int(segundos) * 1000
+            + int(milisegundos.ljust(3, '0')))
+
+
+def tiempo_a_ms(tiempo):
+    """Convierte '00:01:02,345' en 62345."""
+    horas, minutos, resto = tiempo.strip().split(':')
+    segundos, milisegundos = re.split(r'[,.]', resto)
+    return _a_ms(horas, minutos, segundos, milisegundos)
+
+
+def ms_a_tiempo(ms):
+    """Convierte 62345 en '00:01:02,345'."""
+    ms = max(0, int(ms))
+    horas, ms = divmod(ms, 3600000)
+    minutos, ms = divmod(ms, 60000)
+    segundos, ms = divmod(ms, 1000)
+    return f"{horas:02d}:{minutos:02d}:{segundos:02d},{ms:03d}"
+
+
+class Subtitulo:
+    # Sin __dict__ por instancia: un archivo puede tener miles de subtítulos
+    __slots__ = ('numero', 'inicio', 'fin', 'texto', 'fallido')
+
+    def __init__(self, numero, inicio, fin, texto, fallido=False):
+        self.numero = numero
+        self.inicio = inicio  # milisegundos
+        self.fin = fin  # milisegundos
+        self.texto = texto
+        # True si no se pudo traducir y conserva el texto original
+        self.fallido = fallido
+
+    @property
+    def tiempo(self):
+        return f"{ms_a_tiempo(self.inicio)} --> {ms_a_tiempo(self.fin)}"
+
+    @property
+    def duracion(self):
+        return self.fin - self.inicio
+
+    def copiar(self):
+        return Subtitulo(self.numero, self.inicio, self.fin, self.texto, self.fallido)
+
+    def formatear(self):
+        return f"{self.numero}\n{self.tiempo}\n{self.texto}\n\n"
+
+    def __repr__(self):
+        return f"Subtitulo({self.numero}, {self.tiempo!r}, {self.texto!r})"
+
+
+def detectar_codificacion(muestra):
+    """Codificación de un SRT a partir de sus primeros bytes."""
+    if muestra.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if muestra.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    # Sin BOM, un UTF-16 de texto latino tiene un byte nulo de cada dos
+    if muestra and muestra[1::2].count(0) > len(muestra) // 4:
+        return 'utf-16-le'
+    if muestra and muestra[0::2].count(0) > len(muestra) // 4:
+        return 'utf-16-be'
+    try:
+        # final=False: un carácter cortado al final de la muestra no la invalida
+        codecs.getincrementaldecoder('utf-8')().decode(muestra, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1252'
+
+
+def leer_lineas(archivo, info=None):
+    """Genera las líneas de un SRT abierto en modo binario, decodificándolas sobre la marcha.
+
+    La codificación se detecta con los primeros bytes. Si un archivo que
+    parecía UTF-8 tiene más adelante bytes que no lo son, desde esa línea se
+    lee como cp1252 en lugar de volver a leerlo entero. En info (si se pasa)
+    se anotan la codificación detectada y, si la hubo, la línea del cambio.
+    """
+    muestra = archivo.read(TAMANO_MUESTRA)
+    archivo.seek(0)
+    codificacion = detectar_codificacion(muestra)
+    if info is not None:
+        info['codificacion'] = codificacion
+
+    if codificacion.startswith('utf-16'):
+        texto = io.TextIOWrapper(archivo, encoding=codificacion, errors='replace', newline='')
+        try:
+            yield from texto
+        finally:
+            # Sin cerrar el archivo binario, que es de quien lo abrió
+            texto.detach()
+        return
+
+    for numero_linea, linea in enumerate(archivo, 1):
+        if codificacion != 'cp1252':
+            try:
+                yield from _partir_lineas(linea.decode(codificacion))
+                continue
+            except UnicodeDecodeError:
+                codificacion = 'cp1252'
+                if info is not None:
+                    info['codificacion'] = codificacion
+                    info['cambio_en_linea'] = numero_linea
+        yield from _partir_lineas(linea.decode(codificacion, errors='replace'))
+
+
+def _partir_lineas(linea):
+    # El archivo binario solo corta en \n; como open() en modo texto, \r y \r\n
+    # también terminan una línea
+    if '\r' not in linea:
+        return (linea,)
+    return [parte for parte in PATRON_CR_SUELTO.split(linea) if parte]
+
+
+def _leer_bloques(archivo):
+    # Agrupa las líneas no vacías consecutivas; devuelve (número de línea, líneas)
+    bloque = []
+    inicio = 0
+    for numero_linea, linea in enumerate(archivo, 1):
+        linea = linea.rstrip('\r\n')
+        if numero_linea == 1:
+            linea = linea.lstrip('\ufeff')
+        if linea.strip():
+            if not bloque:
+                inicio = numero_linea
+            bloque.append(linea)
+        elif bloque:
+            yield inicio, bloque
+            bloque = []
+    if bloque:
+        yield inicio, bloque
+
+
+def iterar_srt(archivo, errores=None):
+    """Genera los subtítulos de un archivo SRT abierto en modo texto.
+
+    Acepta BOM, finales de línea CRLF, líneas en blanco de más y archivos sin
+    salto de línea final. Los bloques mal formados se descartan y se anotan en
+    la lista errores (si se pasa) sin detener la lectura del resto del archivo.
+    """
+    pendiente = None
+
+    for numero_linea, bloque in _leer_bloques(archivo):
+        # Cabecera normal: número y tiempos; algunos archivos omiten el número
+        if len(bloque) >= 2 and PATRON_NUMERO.match(bloque[0]) and PATRON_TIEMPO.match(bloque[1]):
+            numero = bloque[0].strip()
+            tiempos = PATRON_TIEMPO.match(bloque[1])
+            lineas_texto = bloque[2:]
+        elif PATRON_TIEMPO.match(bloque[0]):
+            numero = None
+            tiempos = PATRON_TIEMPO.match(bloque[0])
+            lineas_texto = bloque[1:]
+        elif pendiente is not None and not PATRON_NUMERO.match(bloque[0]):
+            # Línea en blanco dentro del texto de un subtítulo
+            pendiente.texto += '\n\n' + '\n'.join(bloque).strip()
+            continue
+        else:
+            if errores is not None:
+                errores.append({
+                    'linea': numero_linea,
+                    'contenido': '\n'.join(bloque),
+                    'motivo': 'bloque sin marca de tiempo válida',
+                })
+            continue
+
+        if pendiente is not None:
+            yield pendiente
+
+        if numero is None:
+            numero = pendiente.numero + 1 if pendiente is not None else 1
+
+        pendiente = Subtitulo(
+            int(numero),
+            _a_ms(*tiempos.group(1, 2, 3, 4)),
+            _a_ms(*tiempos.group(5, 6, 7, 8)),
+            '\n'.join(lineas_texto).strip(),
+        )
+
+    if pendiente is not None:
+        yield pendiente
+
+
+def escribir_srt(archivo, subtitulos):
+    for sub in subtitulos:
+        archivo.write(sub.formatear())
+
+
+class EscritorSRT:
+    """Escribe los subtítulos uno a uno en cuanto están listos.
+
+    Cada subtítulo se vuelca al disco al escribirlo, así otros programas pueden
+    ir leyendo el archivo mientras se traduce el resto.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.escritos = 0
+        self._archivo = open(ruta, 'w', encoding='utf-8')
+
+    def escribir(self, subtitulo):
+        self._archivo.write(subtitulo.formatear())
+        self._archivo.flush()
+        self.escritos += 1
+
+    def cerrar(self):
+        if self._archivo is not None:
+            os.fsync(self._archivo.fileno())
+            self._archivo.close()
+            self._archivo = None
+
+
+def _permisos_salida(ruta):
+    # Los del archivo que se sustituye o, si es nuevo, los que le daría open()
+    try:
+        return stat.S_IMODE(os.stat(ruta).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def guardar_srt_atomico(ruta, subtitulos):
+    """Escribe el SRT en un temporal y lo renombra: nunca queda un archivo a medias."""
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    descriptor, temporal = tempfile.mkstemp(
+        prefix='.' + os.path.basename(ruta) + '.', suffix='.tmp', dir=directorio
+    )
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+            escribir_srt(f, subtitulos)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp crea el temporal solo legible por el dueño (0600)
+        os.chmod(temporal, _permisos_salida(ruta))
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
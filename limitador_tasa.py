@@ -0,0 +1,56 @@
+"""
+Limitador de tasa tipo token bucket compartido entre hilos
+Se ajusta solo: reduce la tasa a la mitad cuando el servicio nos limita
+y la recupera poco a poco mientras las peticiones tienen éxito
+"""
+
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger('traductor_srt')
+
+
+class LimitadorTasa:
+    def __init__(self, tasa=5.0, capacidad=None, tasa_minima=0.2, tasa_maxima=None,
+                 factor_reduccion=0.5, incremento=0.1):
+        # tasa: peticiones por segundo permitidas en régimen estable
+        self.tasa = float(tasa)
+        self.capacidad = float(capacidad if capacidad is not None else max(1.0, tasa))
+        self.tasa_minima = tasa_minima
+        self.tasa_maxima = tasa_maxima if tasa_maxima is not None else float(tasa)
+        self.factor_reduccion = factor_reduccion
+        self.incremento = incremento
+        self.tokens = self.capacidad
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _recargar(self):
+        ahora = time.monotonic()
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self._ultimo) * self.tasa)
+        self._ultimo = ahora
+
+    def adquirir(self):
+        while True:
+            with self._lock:
+                self._recargar()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                espera = (1 - self.tokens) / self.tasa
+            time.sleep(espera)
+
+    def registrar_limite(self):
+        # El servicio nos está rechazando: bajar la tasa y vaciar el depósito
+        with self._lock:
+            self._recargar()
+            self.tasa = max(self.tasa_minima, self.tasa * self.factor_reduccion)
+            self.tokens = 0.0
+        logger.info("Rate limiting detectado, nueva tasa: %.2f peticiones/s", self.tasa)
+
+    def registrar_exito(self):
+        with self._lock:
+            if self.tasa < self.tasa_maxima:
+                self._recargar()
+                self.tasa = min(self.tasa_maxima, self.tasa + self.incremento)
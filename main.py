@@ -6,139 +6,18 @@ Traduce archivos de subtítulos del inglés al español (u otros idiomas)
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import threading
-import re
-from deep_translator import GoogleTranslator
+import logging
 import os
-import time
 
+from backends import BackendGoogle
+from cache_traducciones import CacheTraducciones
+from limitador_tasa import LimitadorTasa
+from planificador import PlanificadorTraduccion
+from resiliencia import Disyuntor
+from traductor_srt import TraductorSRT, configurar_log
 
-class TraductorSRT:
-    def __init__(self, idioma_origen='auto', idioma_destino='es', callback_progreso=None):
-        self.idioma_origen = idioma_origen
-        self.idioma_destino = idioma_destino
-        self.traductor = GoogleTranslator(source=idioma_origen, target=idioma_destino)
-        self.callback_progreso = callback_progreso
-    
-    def parsear_srt(self, contenido):
-        print(f"Parseando SRT, tamaño del contenido: {len(contenido)} caracteres")  # Debug
-        patron_subtitulo = re.compile(
-            r'(\d+)\s*\n'
-            r'([\d:,]+ --> [\d:,]+)\s*\n'
-            r'((?:.*\n)*?)'
-            r'(?=\n\d+\s*\n|$)',
-            re.MULTILINE
-        )
-        
-        subtitulos = []
-        for match in patron_subtitulo.finditer(contenido):
-            numero = match.group(1)
-            tiempo = match.group(2)
-            texto = match.group(3).strip()
-            
-            subtitulos.append({
-                'numero': numero,
-                'tiempo': tiempo,
-                'texto': texto
-            })
-        
-        print(f"Subtítulos parseados: {len(subtitulos)}")  # Debug
-        return subtitulos
-    
-    def traducir_texto(self, texto):
-        if not texto.strip():
-            return texto
-        
-        try:
-            print(f"Traduciendo texto: {texto[:50]}...")  # Debug
-            
-            # Traducir todo el texto de una vez es mucho más rápido
-            # que traducir línea por línea
-            try:
-                traduccion = self.traductor.translate(texto)
-                print(f"Traducción completada")  # Debug
-                time.sleep(0.05)  # Delay reducido para evitar rate limiting
-                return traduccion
-            except Exception as e:
-                print(f"Error en traducción completa, intentando línea por línea: {e}")
-                # Fallback: traducir línea por línea si falla
-                lineas = texto.split('\n')
-                lineas_traducidas = []
-                
-                for i, linea in enumerate(lineas, 1):
-                    if linea.strip():
-                        try:
-                            print(f"Traduciendo línea {i}: {linea[:30]}...")  # Debug
-                            traduccion = self.traductor.translate(linea)
-                            lineas_traducidas.append(traduccion)
-                            time.sleep(0.05)  # Delay reducido
-                        except Exception as e:
-                            print(f"Error traduciendo línea: {e}")
-                            lineas_traducidas.append(linea)  # Mantener original si falla
-                    else:
-                        lineas_traducidas.append('')
-                
-                resultado = '\n'.join(lineas_traducidas)
-                return resultado
-        except Exception as e:
-            print(f"Error en traducir_texto: {e}")
-            import traceback
-            traceback.print_exc()
-            return texto
-    
-    def traducir_archivo(self, archivo_entrada, archivo_salida=None):
-        print(f"traducir_archivo: inicio - {archivo_entrada}")  # Debug
-        if archivo_salida is None:
-            nombre_base = os.path.splitext(archivo_entrada)[0]
-            archivo_salida = f"{nombre_base}_traducido.srt"
-        
-        print(f"Archivo de salida: {archivo_salida}")  # Debug
-        
-        try:
-            with open(archivo_entrada, 'r', encoding='utf-8') as f:
-                contenido = f.read()
-            print("Archivo leído con UTF-8")  # Debug
-        except UnicodeDecodeError:
-            print("Error UTF-8, intentando latin-1")  # Debug
-            with open(archivo_entrada, 'r', encoding='latin-1') as f:
-                contenido = f.read()
-        
-        print("Parseando subtítulos...")  # Debug
-        subtitulos = self.parsear_srt(contenido)
-        total = len(subtitulos)
-        print(f"Total de subtítulos a traducir: {total}")  # Debug
-        
-        if self.callback_progreso:
-            print("Llamando callback_progreso inicial")  # Debug
-            self.callback_progreso(0, total, "Iniciando...")
-        
-        subtitulos_traducidos = []
-        batch_size = 3  # Procesar 3 subtítulos antes de actualizar progreso
-        
-        for i, sub in enumerate(subtitulos, 1):
-            print(f"\n--- Subtítulo {i}/{total} ---")  # Debug
-            print(f"Texto original: {sub['texto']}")  # Debug
-            texto_traducido = self.traducir_texto(sub['texto'])
-            subtitulos_traducidos.append({
-                'numero': sub['numero'],
-                'tiempo': sub['tiempo'],
-                'texto': texto_traducido
-            })
-            
-            # Actualizar progreso cada batch_size subtítulos o al final
-            if self.callback_progreso and (i % batch_size == 0 or i == total):
-                print(f"Llamando callback_progreso: {i}/{total}")  # Debug
-                self.callback_progreso(i, total, f"Traduciendo {i}/{total}")
-        
-        print(f"Escribiendo archivo de salida: {archivo_salida}")  # Debug
-        with open(archivo_salida, 'w', encoding='utf-8') as f:
-            for sub in subtitulos_traducidos:
-                f.write(f"{sub['numero']}\n")
-                f.write(f"{sub['tiempo']}\n")
-                f.write(f"{sub['texto']}\n")
-                f.write("\n")
-        
-        print(f"Archivo traducido guardado exitosamente")  # Debug
-        return archivo_salida
+
+logger = logging.getLogger('traductor_srt')
 
 
 class AplicacionTraductor:
@@ -441,7 +320,7 @@ class AplicacionTraductor:
         if self.traduciendo:
             return
         
-        print("Iniciando traducción...")  # Debug
+        logger.debug("Iniciando traducción...")
         self.traduciendo = True
         self.btn_traducir.config(state='disabled', text="Traduciendo...")
         self.barra_progreso['value'] = 0
@@ -457,75 +336,97 @@ class AplicacionTraductor:
     
     def traducir(self):
         try:
-            print("Thread de traducción iniciado")  # Debug
+            logger.debug("Thread de traducción iniciado")
             idioma_orig = self.obtener_codigo_idioma(self.combo_origen.get())
             idioma_dest = self.obtener_codigo_idioma(self.combo_destino.get())
-            print(f"Idiomas: {idioma_orig} -> {idioma_dest}")  # Debug
+            logger.debug("Idiomas: %s -> %s", idioma_orig, idioma_dest)
             
             total_archivos = len(self.archivos_seleccionados)
             archivos_traducidos = []
             
-            for idx, archivo_entrada in enumerate(self.archivos_seleccionados, 1):
+            # Un único backend y limitador para todos los archivos de la tanda
+            backend = BackendGoogle()
+            limitador = LimitadorTasa()
+            disyuntor = Disyuntor()
+            
+            try:
+                cache = CacheTraducciones()
+            except Exception as e:
+                logger.warning("No se pudo abrir la cache de traducciones: %s", e)
+                cache = None
+            
+            traductor = TraductorSRT(
+                idioma_origen=idioma_orig,
+                idioma_destino=idioma_dest,
+                cache=cache,
+                backend=backend,
+                limitador=limitador,
+                disyuntor=disyuntor
+            )
+            
+            # Callbacks del planificador - usar after() para thread-safety
+            def callback_progreso(actual, total, mensaje):
                 try:
-                    print(f"Procesando archivo {idx}/{total_archivos}: {os.path.basename(archivo_entrada)}")  # Debug
+                    progreso_total = (actual / total) * 100 if total > 0 else 0
                     
-                    # Crear nombre de salida: nombre.esp.srt
-                    directorio = os.path.dirname(archivo_entrada)
-                    nombre_base = os.path.splitext(os.path.basename(archivo_entrada))[0]
-                    extension = os.path.splitext(archivo_entrada)[1]
-                    archivo_salida = os.path.join(directorio, f"{nombre_base}.esp{extension}")
-                    
-                    # Variables para cerrar sobre el valor actual de idx
-                    archivo_actual = idx
-                    nombre_archivo = os.path.basename(archivo_entrada)
-                    
-                    # Callback para progreso de cada archivo - usar after() para thread-safety
-                    def callback_progreso(actual, total, mensaje):
+                    def actualizar_gui():
                         try:
-                            progreso_archivo = (actual / total) * 100 if total > 0 else 0
-                            progreso_total = ((archivo_actual - 1) / total_archivos * 100) + (progreso_archivo / total_archivos)
-                            
-                            # Usar after() para actualizar GUI desde thread secundario de forma segura
-                            def actualizar_gui():
-                                try:
-                                    self.barra_progreso['value'] = progreso_total
-                                    self.porcentaje_label.config(text=f"{int(progreso_total)}%")
-                                    self.progreso_archivo_label.config(text=f"Archivo {archivo_actual}/{total_archivos}: {nombre_archivo}")
-                                    self.progreso_label.config(text=mensaje)
-                                except Exception as e:
-                                    print(f"Error actualizando GUI: {e}")
-                            
-                            self.root.after(0, actualizar_gui)
+                            self.barra_progreso['value'] = progreso_total
+                            self.porcentaje_label.config(text=f"{int(progreso_total)}%")
+                            self.progreso_label.config(text=mensaje)
                         except Exception as e:
-                            print(f"Error en callback_progreso: {e}")
+                            logger.warning("Error actualizando GUI: %s", e)
                     
-                    traductor = TraductorSRT(
-                        idioma_origen=idioma_orig,
-                        idioma_destino=idioma_dest,
-                        callback_progreso=callback_progreso
-                    )
-                    
-                    print(f"Iniciando traducción de {nombre_archivo}...")  # Debug
-                    traductor.traducir_archivo(archivo_entrada, archivo_salida)
-                    archivos_traducidos.append(archivo_salida)
-                    print(f"Archivo {nombre_archivo} traducido exitosamente")  # Debug
+                    self.root.after(0, actualizar_gui)
                 except Exception as e:
-                    error_msg = f"Error en archivo {os.path.basename(archivo_entrada)}: {str(e)}"
-                    print(error_msg)
-                    import traceback
-                    traceback.print_exc()
+                    logger.warning("Error en callback_progreso: %s", e)
+            
+            def callback_archivo(archivo_entrada, resultado, terminados, total):
+                nombre_archivo = os.path.basename(archivo_entrada)
+                if isinstance(resultado, Exception):
+                    error_msg = f"Error en archivo {nombre_archivo}: {str(resultado)}"
+                    logger.error(error_msg)
                     self.root.after(0, lambda msg=error_msg: messagebox.showwarning("Error en archivo", msg))
+                elif resultado is None:
+                    logger.info("%s ya está en el idioma destino, no se traduce", nombre_archivo)
+                else:
+                    archivos_traducidos.append(resultado)
+                    logger.debug("Archivo %s traducido exitosamente", nombre_archivo)
+                    logger.info("Métricas de %s: %s", nombre_archivo,
+                                planificador.traductores[archivo_entrada].metricas.a_json())
+                texto = f"Archivos terminados {terminados}/{total} (último: {nombre_archivo})"
+                self.root.after(0, lambda: self.progreso_archivo_label.config(text=texto))
+            
+            # Las peticiones de todos los archivos comparten los hilos, así no hay
+            # pausas entre un archivo y el siguiente
+            planificador = PlanificadorTraduccion(
+                traductor,
+                callback_progreso=callback_progreso,
+                callback_archivo=callback_archivo
+            )
+            for archivo_entrada in self.archivos_seleccionados:
+                # Crear nombre de salida: nombre.esp.srt
+                directorio = os.path.dirname(archivo_entrada)
+                nombre_base = os.path.splitext(os.path.basename(archivo_entrada))[0]
+                extension = os.path.splitext(archivo_entrada)[1]
+                planificador.agregar(archivo_entrada, os.path.join(directorio, f"{nombre_base}.esp{extension}"))
+            
+            self.root.after(0, lambda: self.progreso_archivo_label.config(
+                text=f"Traduciendo {total_archivos} archivo(s)..."))
+            planificador.ejecutar()
+            
+            if cache is not None:
+                logger.info("Cache de traducciones: %s", cache.estadisticas())
+                cache.cerrar()
             
-            print("Traducción completada, actualizando GUI...")  # Debug
+            logger.debug("Traducción completada, actualizando GUI...")
             self.root.after(0, lambda: self.traduccion_completada(archivos_traducidos))
         except Exception as e:
-            print(f"Error general: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error general: %s", e)
             self.root.after(0, lambda: self.traduccion_error(str(e)))
     
     def traduccion_completada(self, archivos_salida):
-        print("traduccion_completada llamado")  # Debug
+        logger.debug("traduccion_completada llamado")
         self.traduciendo = False
         self.btn_traducir.config(state='normal', text="Traducir Subtítulos")
         self.barra_progreso['value'] = 100
@@ -555,6 +456,7 @@ class AplicacionTraductor:
 
 
 def main():
+    configurar_log(os.environ.get('TRADUCTOR_NIVEL_LOG', 'INFO'))
     root = tk.Tk()
     app = AplicacionTraductor(root)
     root.mainloop()
@@ -0,0 +1,87 @@
+"""
+Memoria de traducción aproximada
+Forma canónica de un subtítulo para encontrar otros ya traducidos que solo se
+diferencian en la puntuación, las mayúsculas, un nombre o un número, y adaptar
+su traducción al texto nuevo. CacheTraducciones guarda la forma canónica de
+cada texto en SQLite, así cada búsqueda es una consulta por índice
+"""
+
+import re
+
+
+PATRON_PALABRA = re.compile(r"\d+(?:[.,:]\d+)*|\w+(?:'\w+)*")
+PATRON_FIN_ORACION = re.compile(r'[.!?…]\s*$')
+# Puntuación final que se puede cambiar en la traducción sin depender del idioma
+PATRON_PUNTUACION_FINAL = re.compile(r'(\.\.\.|…|[.,])?$')
+
+
+def analizar(texto):
+    """Devuelve (forma canónica, variables) de un texto.
+
+    La forma canónica va en minúsculas y sin puntuación, con '#' en lugar de
+    cada número y '@' en lugar de cada nombre propio (palabra con mayúscula
+    que no empieza oración). Las variables son esos números y nombres, en orden.
+    """
+    canonica = []
+    variables = []
+    inicio_oracion = True
+    for coincidencia in PATRON_PALABRA.finditer(texto):
+        palabra = coincidencia.group()
+        if palabra[0].isdigit():
+            canonica.append('#')
+            variables.append(palabra)
+        elif (palabra[0].isupper() and not inicio_oracion and not palabra.isupper()
+              and len(palabra.split("'")[0]) > 1):
+            canonica.append('@')
+            variables.append(palabra)
+        else:
+            canonica.append(palabra.lower())
+        inicio_oracion = bool(PATRON_FIN_ORACION.search(texto, 0, coincidencia.end() + 2))
+    return ' '.join(canonica), variables
+
+
+def _reemplazar_palabra(texto, vieja, nueva):
+    patron = re.compile(r'(?<!\w)' + re.escape(vieja) + r'(?!\w)')
+    if not patron.search(texto):
+        return None
+    return patron.sub(lambda _: nueva, texto)
+
+
+def adaptar(original, traduccion, texto):
+    """Adapta la traducción de original a texto, casi igual que él.
+
+    Solo se adapta si las dos formas canónicas son iguales, es decir, si
+    difieren únicamente en números, nombres, puntuación o mayúsculas.
+    Sustituye en la traducción los números y nombres que cambian, copia la
+    puntuación final (puntos, comas y suspensivos) y pasa a mayúsculas si el
+    texto nuevo lo está. Devuelve None si no se puede hacer con seguridad
+    (otra palabra distinta, o el nombre no aparece tal cual en la traducción).
+    """
+    canonica_original, variables_original = analizar(original)
+    canonica_texto, variables_texto = analizar(texto)
+    # Cualquier palabra corriente distinta ("not", "she"...) puede cambiar el sentido
+    if canonica_original != canonica_texto:
+        return None
+    for vieja, nueva in zip(variables_original, variables_texto):
+        if vieja != nueva:
+            traduccion = _reemplazar_palabra(traduccion, vieja, nueva)
+            if traduccion is None:
+                return None
+
+    # ¿? y ¡! dependen del idioma destino: si cambian, no se adapta
+    if original.rstrip()[-1:] in ('?', '!') or texto.rstrip()[-1:] in ('?', '!'):
+        if original.rstrip()[-1:] != texto.rstrip()[-1:]:
+            return None
+    final_original = PATRON_PUNTUACION_FINAL.search(original.rstrip()).group()
+    final_texto = PATRON_PUNTUACION_FINAL.search(texto.rstrip()).group()
+    if final_original != final_texto:
+        traduccion = traduccion.rstrip()
+        traduccion = traduccion[:len(traduccion) - len(PATRON_PUNTUACION_FINAL.search(traduccion).group())]
+        traduccion += final_texto
+
+    if texto.isupper() and not original.isupper():
+        traduccion = traduccion.upper()
+    elif original.isupper() and not texto.isupper():
+        # No hay forma fiable de recuperar las mayúsculas de nombres y oraciones
+        return None
+    return traduccion
@@ -0,0 +1,95 @@
+"""
+Métricas de rendimiento de la traducción
+Tiempos por etapa, histograma de latencia de las peticiones y contadores
+(reintentos, divisiones de lote, cache, caracteres enviados), exportables a JSON
+"""
+
+import contextlib
+import json
+import threading
+import time
+
+
+# Límites superiores (segundos) de los tramos del histograma de latencia
+LIMITES_LATENCIA = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metricas:
+    def __init__(self):
+        self.etapas = {}
+        self.contadores = {}
+        # Un tramo por límite más uno final para lo que supere el último
+        self.histograma = [0] * (len(LIMITES_LATENCIA) + 1)
+        self.latencia_total = 0.0
+        self.latencia_maxima = 0.0
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def etapa(self, nombre):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sumar_tiempo(nombre, time.perf_counter() - inicio)
+
+    def sumar_tiempo(self, nombre, segundos):
+        with self._lock:
+            self.etapas[nombre] = self.etapas.get(nombre, 0.0) + segundos
+
+    def incrementar(self, contador, cantidad=1):
+        with self._lock:
+            self.contadores[contador] = self.contadores.get(contador, 0) + cantidad
+
+    def registrar_peticion(self, segundos, caracteres, error=None):
+        tramo = len(LIMITES_LATENCIA)
+        for n, limite in enumerate(LIMITES_LATENCIA):
+            if segundos <= limite:
+                tramo = n
+                break
+
+        with self._lock:
+            self.histograma[tramo] += 1
+            self.latencia_total += segundos
+            self.latencia_maxima = max(self.latencia_maxima, segundos)
+            self.contadores['peticiones'] = self.contadores.get('peticiones', 0) + 1
+            self.contadores['caracteres_enviados'] = (
+                self.contadores.get('caracteres_enviados', 0) + caracteres
+            )
+            if error is not None:
+                clave = f"errores_{error}"
+                self.contadores[clave] = self.contadores.get(clave, 0) + 1
+
+    def combinar(self, otra):
+        """Acumula en esta instancia las métricas de otra (o de un resumen)."""
+        resumen = otra.resumen() if isinstance(otra, Metricas) else otra
+        with self._lock:
+            for nombre, segundos in resumen['etapas'].items():
+                self.etapas[nombre] = self.etapas.get(nombre, 0.0) + segundos
+            for nombre, cantidad in resumen['contadores'].items():
+                self.contadores[nombre] = self.contadores.get(nombre, 0) + cantidad
+            latencia = resumen['latencia']
+            for n, cantidad in enumerate(latencia['histograma'].values()):
+                self.histograma[n] += cantidad
+            self.latencia_total += latencia['total_segundos']
+            self.latencia_maxima = max(self.latencia_maxima, latencia['maxima_segundos'])
+
+    def resumen(self):
+        with self._lock:
+            peticiones = sum(self.histograma)
+            tramos = [f"<={limite}s" for limite in LIMITES_LATENCIA]
+            tramos.append(f">{LIMITES_LATENCIA[-1]}s")
+            return {
+                'etapas': dict(self.etapas),
+                'contadores': dict(self.contadores),
+                'latencia': {
+                    'histograma': dict(zip(tramos, self.histograma)),
+                    'total_segundos': self.latencia_total,
+                    'media_segundos': self.latencia_total / peticiones if peticiones else 0.0,
+                    'maxima_segundos': self.latencia_maxima,
+                },
+            }
+
+    def a_json(self, **extra):
+        datos = dict(extra)
+        datos.update(self.resumen())
+        return json.dumps(datos, indent=2, ensure_ascii=False)
@@ -0,0 +1,160 @@
+"""
+Planificador de traducción entre varios archivos
+Reparte en un único grupo de hilos las peticiones de todos los archivos de una
+tanda, alternando entre ellos para que ninguno se quede atrás, de modo que el
+backend no se queda ocioso entre un archivo y el siguiente. Cada archivo se
+escribe en cuanto termina su última petición.
+"""
+
+import collections
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+logger = logging.getLogger('traductor_srt')
+
+
+class PlanificadorTraduccion:
+    def __init__(self, traductor, hilos=None, max_archivos_activos=3,
+                 callback_progreso=None, callback_archivo=None):
+        # traductor: configuración y recursos (backend, cache, limitador) que
+        # comparten todos los archivos; cada uno recibe su propio TraductorSRT
+        self.traductor = traductor
+        self.hilos = hilos or traductor.hilos
+        # Pocos archivos a la vez: el reparto es justo entre ellos pero los
+        # primeros se terminan y escriben sin esperar al resto de la tanda
+        self.max_archivos_activos = max(1, max_archivos_activos)
+        # callback_progreso(completados, total_estimado, mensaje) con ETA y velocidad
+        self.callback_progreso = callback_progreso
+        # callback_archivo(archivo_entrada, resultado, terminados, total_archivos)
+        self.callback_archivo = callback_archivo
+        self.cola = []
+        self.traductores = {}
+
+    def agregar(self, archivo_entrada, archivo_salida):
+        self.cola.append((archivo_entrada, archivo_salida))
+
+    def ejecutar(self):
+        """Traduce todos los archivos de la cola.
+
+        Devuelve {archivo_entrada: ruta de salida o excepción} en el orden en
+        que se agregaron.
+        """
+        pendientes = collections.deque(self.cola)
+        resultados = {}
+        # Archivos preparados sin terminar y, de ellos, los que aún tienen unidades sin enviar
+        activos = []
+        turno = collections.deque()
+        en_vuelo = {}
+
+        self._inicio = time.perf_counter()
+        self._completados = 0
+        self._subtitulos_preparados = 0
+        self._bytes_preparados = 0
+        self._bytes_totales = sum(self._tamano(entrada) for entrada, _ in self.cola)
+
+        def terminar(traductor, trabajo, entrada):
+            try:
+                resultados[entrada] = traductor.finalizar_trabajo(trabajo)
+            except Exception as e:
+                logger.error("Error escribiendo %s: %s", trabajo.archivo_salida, e)
+                resultados[entrada] = e
+            self._notificar_archivo(entrada, resultados)
+
+        with ThreadPoolExecutor(max_workers=self.hilos) as executor:
+            try:
+                while True:
+                    # Preparar el siguiente archivo si hay hueco, o si lo activo ya
+                    # está todo enviado y los hilos quedarían esperando su cola
+                    while pendientes and (len(activos) < self.max_archivos_activos or not turno):
+                        entrada, salida = pendientes.popleft()
+                        preparado = self._preparar(entrada, salida, resultados)
+                        if preparado is None:
+                            continue
+                        traductor, trabajo = preparado
+                        if trabajo.terminado:
+                            terminar(traductor, trabajo, entrada)
+                            continue
+                        activos.append(trabajo)
+                        turno.append((entrada, traductor, trabajo, collections.deque(trabajo.unidades)))
+
+                    # Mantener el grupo lleno, una unidad de cada archivo por turno
+                    while turno and len(en_vuelo) < self.hilos * 2:
+                        entrada, traductor, trabajo, unidades = turno.popleft()
+                        unidad = unidades.popleft()
+                        futuro = executor.submit(traductor.traducir_lote,
+                                                 traductor.textos_unidad(trabajo, unidad))
+                        en_vuelo[futuro] = (entrada, traductor, trabajo, unidad)
+                        if unidades:
+                            turno.append((entrada, traductor, trabajo, unidades))
+
+                    if not en_vuelo:
+                        break
+
+                    hechos, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                    for futuro in hechos:
+                        entrada, traductor, trabajo, unidad = en_vuelo.pop(futuro)
+                        traductor.registrar_resultado(trabajo, unidad, futuro.result())
+                        self._completados += len(unidad)
+                        self._notificar_progreso()
+                        if trabajo.terminado:
+                            activos.remove(trabajo)
+                            terminar(traductor, trabajo, entrada)
+            finally:
+                for trabajo in activos:
+                    trabajo.cerrar_diario()
+                    trabajo.cerrar_escritor()
+
+        return {entrada: resultados[entrada] for entrada, _ in self.cola}
+
+    def _preparar(self, archivo_entrada, archivo_salida, resultados):
+        traductor = self.traductor.para_destino(self.traductor.idioma_destino, metricas=None)
+        self.traductores[archivo_entrada] = traductor
+        try:
+            subtitulos = traductor.leer_subtitulos(archivo_entrada)
+            trabajo = traductor.preparar_trabajo(subtitulos, archivo_salida)
+        except Exception as e:
+            logger.error("Error preparando %s: %s", archivo_entrada, e)
+            resultados[archivo_entrada] = e
+            self._notificar_archivo(archivo_entrada, resultados)
+            return None
+
+        self._subtitulos_preparados += len(subtitulos)
+        self._bytes_preparados += self._tamano(archivo_entrada)
+        # Lo que ya estaba resuelto (cache, diario, duplicados) cuenta como hecho
+        self._completados += trabajo.completados
+        return traductor, trabajo
+
+    def _tamano(self, archivo):
+        try:
+            return os.path.getsize(archivo)
+        except OSError:
+            return 0
+
+    def total_estimado(self):
+        # Los archivos aún sin leer se estiman por su tamaño con la densidad de los ya leídos
+        total = self._subtitulos_preparados
+        faltan = self._bytes_totales - self._bytes_preparados
+        if faltan > 0 and self._bytes_preparados:
+            total += round(faltan * self._subtitulos_preparados / self._bytes_preparados)
+        return max(total, self._completados)
+
+    def _notificar_progreso(self):
+        if not self.callback_progreso:
+            return
+        total = self.total_estimado()
+        transcurrido = time.perf_counter() - self._inicio
+        velocidad = self._completados / transcurrido if transcurrido > 0 else 0.0
+        mensaje = f"Traduciendo {self._completados}/{total} · {velocidad:.1f} subt/s"
+        if velocidad > 0:
+            restante = (total - self._completados) / velocidad
+            minutos, segundos = divmod(int(restante), 60)
+            mensaje += f" · quedan {minutos}:{segundos:02d}"
+        self.callback_progreso(self._completados, total, mensaje)
+
+    def _notificar_archivo(self, archivo_entrada, resultados):
+        if self.callback_archivo:
+            self.callback_archivo(archivo_entrada, resultados[archivo_entrada],
+                                  len(resultados), len(self.cola))
@@ -0,0 +1,74 @@
+"""
+Política de fallos del traductor
+Reintentos con espera exponencial y jitter para los errores transitorios, y un
+disyuntor (circuit breaker) que pausa todo el trabajo cuando el servicio falla
+de forma sostenida, en lugar de seguir insistiendo con más peticiones
+"""
+
+import logging
+import random
+import threading
+import time
+
+
+logger = logging.getLogger('traductor_srt')
+
+
+class PoliticaReintentos:
+    def __init__(self, max_intentos=4, espera_base=0.5, espera_maxima=30.0, semilla=None):
+        self.max_intentos = max_intentos
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self._aleatorio = random.Random(semilla)
+        self._lock = threading.Lock()
+
+    def espera(self, intento):
+        # "Full jitter": espera aleatoria entre 0 y el tope exponencial, así los
+        # hilos que fallaron a la vez no vuelven a chocar al mismo tiempo
+        tope = min(self.espera_maxima, self.espera_base * (2 ** intento))
+        with self._lock:
+            return self._aleatorio.uniform(0, tope)
+
+
+class Disyuntor:
+    def __init__(self, umbral_fallos=5, pausa=15.0, pausa_maxima=300.0):
+        self.umbral_fallos = umbral_fallos
+        self.pausa_inicial = pausa
+        self.pausa_maxima = pausa_maxima
+        self.pausa = pausa
+        self.fallos_seguidos = 0
+        self.aperturas = 0
+        self._abierto_hasta = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def abierto(self):
+        return time.monotonic() < self._abierto_hasta
+
+    def esperar(self):
+        """Bloquea mientras el disyuntor esté abierto."""
+        while True:
+            with self._lock:
+                restante = self._abierto_hasta - time.monotonic()
+            if restante <= 0:
+                return
+            time.sleep(min(restante, 1.0))
+
+    def registrar_exito(self):
+        with self._lock:
+            self.fallos_seguidos = 0
+            self.pausa = self.pausa_inicial
+
+    def registrar_fallo(self):
+        with self._lock:
+            self.fallos_seguidos += 1
+            ahora = time.monotonic()
+            if self.fallos_seguidos < self.umbral_fallos or ahora < self._abierto_hasta:
+                return
+            self._abierto_hasta = ahora + self.pausa
+            self.aperturas += 1
+            self.fallos_seguidos = 0
+            pausa = self.pausa
+            # Si al reabrir sigue fallando, la siguiente pausa es más larga
+            self.pausa = min(self.pausa_maxima, self.pausa * 2)
+        logger.warning("Servicio fallando de forma sostenida: pausando el trabajo %.0f s", pausa)
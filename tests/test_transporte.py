@@ -0,0 +1,103 @@
+"""
+Prueba del transporte compartido a través de deep_translator
+BackendGoogle.traducir contra un servidor HTTP local que cuenta las
+conexiones TCP: con el módulo requests de deep_translator sustituido, todas
+las traducciones salen por el pool y no se abre una conexión por petición
+"""
+
+import http.server
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+try:
+    import requests  # noqa: F401
+    from deep_translator import constants, google
+except ImportError:
+    google = None
+
+from backends import BackendGoogle
+from transporte import TransporteHTTP
+
+
+class _Servidor(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _Manejador)
+        self.conexiones = 0
+        self.peticiones = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/m"
+
+
+class _Manejador(http.server.BaseHTTPRequestHandler):
+    # HTTP/1.1: la conexión queda abierta para las siguientes peticiones
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server._lock:
+            self.server.conexiones += 1
+
+    def do_GET(self):
+        with self.server._lock:
+            self.server.peticiones += 1
+        texto = parse_qs(urlparse(self.path).query)['q'][0]
+        # El mismo HTML del que GoogleTranslator saca la traducción
+        cuerpo = f'<div class="t0">es: {texto}</div>'.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+@unittest.skipIf(google is None, "requests o deep_translator no están instalados")
+class PruebaTransporteDeepTranslator(unittest.TestCase):
+    PETICIONES = 60
+    HILOS = 6
+    TAMANO_POOL = 2
+
+    def setUp(self):
+        self.servidor = _Servidor()
+        hilo = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+        hilo.start()
+        self.addCleanup(self.servidor.server_close)
+        self.addCleanup(self.servidor.shutdown)
+
+        # instalar_en_deep_translator sustituye el módulo requests de google
+        requests_original = google.requests
+        self.addCleanup(setattr, google, 'requests', requests_original)
+        url = mock.patch.dict(constants.BASE_URLS, {'GOOGLE_TRANSLATE': self.servidor.url})
+        url.start()
+        self.addCleanup(url.stop)
+
+        self.transporte = TransporteHTTP(tamano_pool=self.TAMANO_POOL)
+        self.addCleanup(self.transporte.cerrar)
+
+    def test_traducir_reutiliza_las_conexiones_del_pool(self):
+        backend = BackendGoogle(transporte=self.transporte)
+
+        with ThreadPoolExecutor(max_workers=self.HILOS) as executor:
+            traducciones = list(executor.map(
+                lambda n: backend.traducir(f'hello {n}', 'en', 'es'), range(self.PETICIONES)
+            ))
+
+        self.assertEqual(traducciones, [f'es: hello {n}' for n in range(self.PETICIONES)])
+        self.assertEqual(self.servidor.peticiones, self.PETICIONES)
+        # Sin el transporte, deep_translator abriría una conexión por traducción
+        self.assertLessEqual(self.servidor.conexiones, self.TAMANO_POOL)
+
+
+if __name__ == '__main__':
+    unittest.main()
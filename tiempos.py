@@ -0,0 +1,84 @@
+"""
+Ajustes de tiempos de los subtítulos
+Desplazamiento, cambio de fotogramas por segundo (p. ej. 23,976 -> 25),
+duración mínima, tiempo de lectura de la traducción y solapes, aplicados
+durante la traducción sobre los tiempos de todo el archivo, sin una pasada
+aparte de lectura y escritura
+"""
+
+from array import array
+
+from etiquetas import PATRON_ETIQUETA
+
+
+class AjusteTiempos:
+    def __init__(self, desplazamiento=0, fps_origen=None, fps_destino=None, duracion_minima=0,
+                 caracteres_por_segundo=None, separacion_minima=0, corregir_solapes=False):
+        # desplazamiento: ms que se suman a todos los tiempos (negativo adelanta),
+        # ya en la velocidad de fps_destino
+        self.desplazamiento = desplazamiento
+        self.fps_origen = fps_origen
+        self.fps_destino = fps_destino
+        # Los subtítulos más cortos (ms) o con más caracteres por segundo de lo
+        # que se puede leer se alargan, sin pisar el siguiente
+        self.duracion_minima = duracion_minima
+        self.caracteres_por_segundo = caracteres_por_segundo
+        # Pausa (ms) que se deja hasta el subtítulo siguiente al alargar o al corregir solapes
+        self.separacion_minima = separacion_minima
+        # Recortar el final de los subtítulos que se solapan con el siguiente
+        self.corregir_solapes = corregir_solapes
+
+    @property
+    def activo(self):
+        return bool(self.desplazamiento or self.factor != 1.0 or self.duracion_minima
+                    or self.caracteres_por_segundo or self.corregir_solapes)
+
+    @property
+    def factor(self):
+        if self.fps_origen and self.fps_destino:
+            return self.fps_origen / self.fps_destino
+        return 1.0
+
+    def tiempos_base(self, subtitulos):
+        """(inicios, fines) en ms de todos los subtítulos, con el cambio de fps y
+        el desplazamiento aplicados.
+
+        Los inicios ya son los definitivos; los fines se terminan de ajustar en
+        aplicar(), cuando se conoce la traducción.
+        """
+        factor = self.factor
+        desplazamiento = self.desplazamiento
+        inicios = array('q', (max(0, round(sub.inicio * factor) + desplazamiento) for sub in subtitulos))
+        fines = array('q', (max(0, round(sub.fin * factor) + desplazamiento) for sub in subtitulos))
+        return inicios, fines
+
+    def aplicar(self, tiempos, subtitulos, desde=0, hasta=None):
+        """Fija los tiempos de subtitulos[desde:hasta] según su texto (ya traducido).
+
+        Solo hace falta el inicio del subtítulo siguiente, así que se puede
+        aplicar por tramos a medida que se completan.
+        """
+        inicios, fines = tiempos
+        if hasta is None:
+            hasta = len(subtitulos)
+        ultimo = len(subtitulos) - 1
+        minima = self.duracion_minima
+        cps = self.caracteres_por_segundo
+        separacion = self.separacion_minima
+        for i in range(desde, hasta):
+            sub = subtitulos[i]
+            inicio = inicios[i]
+            fin = fines[i]
+            objetivo = max(fin, inicio + minima)
+            if cps:
+                caracteres = len(PATRON_ETIQUETA.sub('', sub.texto).replace('\n', ''))
+                objetivo = max(objetivo, inicio + round(caracteres * 1000 / cps))
+            if i < ultimo and inicios[i + 1] > inicio:
+                limite = inicios[i + 1] - separacion
+                # Alargar nunca crea un solape; recortar solo si se pide
+                fin = min(objetivo, limite) if self.corregir_solapes else min(objetivo, max(fin, limite))
+            else:
+                fin = objetivo
+            fines[i] = fin = max(fin, inicio)
+            sub.inicio = inicio
+            sub.fin = fin
@@ -0,0 +1,1367 @@
+"""
+Traductor de subtítulos SRT
+Núcleo de traducción (sin interfaz gráfica) y modo de línea de comandos para
+traducir muchos archivos en paralelo en servidores sin pantalla
+
+Uso:
+    python traductor_srt.py archivo.srt
+    python traductor_srt.py archivo.srt en es
+    python traductor_srt.py carpeta/ "temporada*/*.srt" --destino es --procesos 4
+"""
+
+import argparse
+import functools
+import glob
+import io
+import json
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+from backends import BackendGoogle, BackendSimulado, ErrorBackend, ErrorLimiteTasa, ErrorTextoInvalido
+from cache_traducciones import CacheTraducciones, RUTA_CACHE_PREDETERMINADA, normalizar_texto
+from diario import DiarioProgreso
+from etiquetas import enmascarar, restaurar
+from formato_srt import EscritorSRT, iterar_srt, guardar_srt_atomico, leer_lineas
+from limitador_tasa import LimitadorTasa
+from metricas import Metricas
+from resiliencia import Disyuntor, PoliticaReintentos
+from tiempos import AjusteTiempos
+from transporte import transporte_compartido
+
+
+logger = logging.getLogger('traductor_srt')
+
+# Subtítulos sin nada que traducir: solo símbolos musicales, números o puntuación
+PATRON_SIN_LETRAS = re.compile(r'^[\W\d_♪♫]*$')
+# Etiqueta de personaje sola en el subtítulo: "JOHN:", "- MARY:"
+PATRON_ETIQUETA_PERSONAJE = re.compile(r"^[-–\s]*[A-ZÁÉÍÓÚÑ][A-ZÁÉÍÓÚÑ0-9 .'-]*:$")
+# Efecto de sonido solo en la línea, entre corchetes o paréntesis: "[LAUGHS]", "- (RISAS)"
+PATRON_EFECTO_SONIDO = re.compile(r'^[-–\s♪♫]*(?:(?:\[[^\[\]]+\]|\([^()]+\))[\s.!?♪♫]*)+$')
+
+
+def dividir_texto(texto):
+    """Parte el texto en (izquierda, separador, derecha) cerca del centro.
+    
+    Prefiere saltos de línea, luego finales de frase y luego espacios.
+    Devuelve None si no hay por dónde partirlo.
+    """
+    centro = len(texto) // 2
+    for patron in (r'\n+', r'(?<=[.!?…])\s+', r'\s+'):
+        cortes = [m for m in re.finditer(patron, texto) if 0 < m.start() and m.end() < len(texto)]
+        if cortes:
+            corte = min(cortes, key=lambda m: abs(m.start() - centro))
+            return texto[:corte.start()], corte.group(), texto[corte.end():]
+    return None
+
+
+def repartir_texto(texto, pesos):
+    """Parte texto en len(pesos) trozos de longitud proporcional a pesos,
+    cortando siempre entre palabras. Si no hay palabras para todos, los
+    últimos trozos quedan vacíos."""
+    palabras = texto.split()
+    cantidad = len(pesos)
+    if cantidad <= 1 or len(palabras) <= 1:
+        return [' '.join(palabras)] + [''] * (cantidad - 1)
+    
+    # Posición (en caracteres) tras cada palabra y posición ideal de cada corte
+    finales = []
+    posicion = 0
+    for palabra in palabras:
+        posicion += len(palabra) + 1
+        finales.append(posicion)
+    if not sum(pesos):
+        pesos = [1] * cantidad
+    total = sum(pesos)
+    acumulado = 0
+    cortes = []
+    anterior = 0
+    for n, peso in enumerate(pesos[:-1], 1):
+        acumulado += peso
+        objetivo = finales[-1] * acumulado / total
+        # Al menos una palabra por trozo mientras queden palabras
+        minimo = min(anterior + 1, len(palabras))
+        maximo = max(minimo, len(palabras) - (cantidad - n))
+        corte = min(range(minimo, maximo + 1), key=lambda k: abs(finales[k - 1] - objetivo))
+        cortes.append(corte)
+        anterior = corte
+    
+    trozos = []
+    inicio = 0
+    for corte in cortes + [len(palabras)]:
+        trozos.append(' '.join(palabras[inicio:corte]))
+        inicio = max(inicio, corte)
+    return trozos
+
+
+def mismo_idioma(idioma, otro):
+    # 'en' y 'en-GB' (o 'zh-cn' y 'zh-CN') cuentan como el mismo idioma
+    if not idioma or not otro or 'auto' in (idioma, otro):
+        return False
+    return idioma.split('-')[0].lower() == otro.split('-')[0].lower()
+
+
+def es_intraducible(texto, omitir=()):
+    texto = texto.strip()
+    if PATRON_SIN_LETRAS.match(texto):
+        return True
+    if all(PATRON_ETIQUETA_PERSONAJE.match(linea.strip()) or PATRON_EFECTO_SONIDO.match(linea.strip())
+           for linea in texto.splitlines()):
+        return True
+    return normalizar_texto(texto) in omitir
+
+
+class TrabajoArchivo:
+    """Estado de un archivo en traducción: lo que queda por pedir y cómo rearmarlo."""
+    
+    def __init__(self, subtitulos, archivo_salida, pendientes, unidades, copias, diario):
+        self.subtitulos = subtitulos
+        self.archivo_salida = archivo_salida
+        self.pendientes = pendientes
+        self.unidades = unidades
+        self.copias = copias
+        self.diario = diario
+        self.completados = 0
+        self.restantes = len(unidades)
+        self.inicio = 0.0
+        self.ya_en_destino = False
+        # Índice -> etiquetas de formato quitadas antes de traducir
+        self.marcas = {}
+        # Subtítulos que esperan la respuesta del backend
+        self.en_curso = {i for unidad in unidades for i in unidad}
+        # Subtítulos ya completados (y escritos, con salida progresiva) desde el principio
+        self.escritos = 0
+        self.escritor = None
+        # Primer índice -> miembros de las frases agrupadas (ver agrupar_frases),
+        # cada miembro -> primer índice de su grupo, y los trozos aún por colocar
+        self.grupos = {}
+        self.miembro_de = {}
+        self.fragmentos = {}
+        # Traducción sin etiquetas de los subtítulos que tienen repeticiones
+        self.originales = set(copias.values())
+        self.textos_traducidos = {}
+        # (inicios, fines) en ms con los ajustes de tiempos, o None si no hay
+        self.tiempos = None
+    
+    @property
+    def terminado(self):
+        return self.restantes == 0
+    
+    def cerrar_diario(self):
+        if self.diario is not None:
+            self.diario.cerrar()
+    
+    def cerrar_escritor(self):
+        if self.escritor is not None:
+            self.escritor.cerrar()
+
+
+class TraductorSRT:
+    # Margen respecto al máximo del backend para los marcadores y la codificación
+    FRACCION_LOTE = 0.9
+    # El diario de progreso vive junto al archivo de salida hasta que este se escribe
+    EXTENSION_DIARIO = '.progreso'
+    # Una pausa mayor (ms) entre dos subtítulos separa frases aunque falte la puntuación
+    HUECO_MAXIMO_FRASE = 1500
+    MAX_SUBTITULOS_FRASE = 4
+    MAX_CARACTERES_FRASE = 400
+    PATRON_FIN_FRASE = re.compile(r'[.!?…♪:;]["\'»”’)\]]*$')
+    PATRON_SUSPENSIVOS_FINAL = re.compile(r'\s*(\.\.\.|…)$')
+    PATRON_SUSPENSIVOS_INICIAL = re.compile(r'^(\.\.\.|…)\s*')
+    # Guion de diálogo: cada línea es de un personaje distinto
+    PATRON_DIALOGO = re.compile(r'^\s*[-–—]', re.MULTILINE)
+    # Subtítulos repartidos por el archivo con los que se detecta el idioma origen
+    MUESTRA_DETECCION = 30
+    # Letras mínimas para fiarse del idioma detectado en un subtítulo suelto
+    MIN_LETRAS_DETECCION = 30
+    
+    def __init__(self, idioma_origen='auto', idioma_destino='es', callback_progreso=None,
+                 usar_lotes=True, max_caracteres_lote=None, cache=None,
+                 hilos=4, limitador=None, backend=None, reanudar=True, omitir=(),
+                 metricas=None, politica=None, disyuntor=None, salida_progresiva=False,
+                 agrupar_frases=True, usar_memoria=True, ajuste_tiempos=None):
+        self.idioma_origen = idioma_origen
+        # Con 'auto' el idioma se detecta una vez por archivo y se fija para sus peticiones
+        self.detectar_origen = idioma_origen == 'auto'
+        self.idioma_destino = idioma_destino
+        self.callback_progreso = callback_progreso
+        self.usar_lotes = usar_lotes
+        self.backend = backend if backend is not None else BackendGoogle()
+        if max_caracteres_lote is None:
+            max_caracteres_lote = int(self.backend.max_caracteres * self.FRACCION_LOTE)
+        self.max_caracteres_lote = max_caracteres_lote
+        self.cache = cache
+        self.hilos = max(1, hilos)
+        self.limitador = limitador if limitador is not None else LimitadorTasa()
+        self.politica = politica if politica is not None else PoliticaReintentos()
+        self.disyuntor = disyuntor if disyuntor is not None else Disyuntor()
+        self.reanudar = reanudar
+        # Escribir cada subtítulo en cuanto él y todos los anteriores están traducidos,
+        # en lugar de escribir el archivo completo (y de forma atómica) al final
+        self.salida_progresiva = salida_progresiva
+        # Traducir juntas las frases que continúan en los subtítulos siguientes
+        self.agrupar = agrupar_frases
+        # Reutilizar de la cache la traducción de un texto que solo cambia en
+        # números, nombres, puntuación o mayúsculas
+        self.usar_memoria = usar_memoria
+        # AjusteTiempos que se aplica a los tiempos al escribir la traducción
+        self.ajuste_tiempos = ajuste_tiempos if ajuste_tiempos is not None and ajuste_tiempos.activo else None
+        # Textos que no se envían al backend (p. ej. efectos ya en el idioma destino)
+        self.omitir = {normalizar_texto(texto) for texto in omitir}
+        self.estadisticas = {}
+        self.metricas = metricas if metricas is not None else Metricas()
+        self.errores_parseo = []
+        self.total_subtitulos = 0
+        # Texto original normalizado -> traducción, tomado de una versión anterior del archivo
+        self.traducciones_previas = {}
+    
+    def pedir_traduccion(self, texto):
+        return self._pedir(
+            lambda: self.backend.traducir(texto, self.idioma_origen, self.idioma_destino), len(texto)
+        )
+    
+    def pedir_traducciones(self, textos):
+        """Traducciones de varios textos en una petición, o None si la respuesta
+        no se pudo repartir entre ellos."""
+        return self._pedir(
+            lambda: self.backend.traducir_varios(textos, self.idioma_origen, self.idioma_destino),
+            sum(len(texto) for texto in textos)
+        )
+    
+    def _pedir(self, llamada, caracteres):
+        """Hace una petición al backend reintentando los errores transitorios.
+        
+        Espera con backoff exponencial y jitter entre intentos y respeta el
+        disyuntor compartido; los errores permanentes se propagan enseguida.
+        """
+        intento = 0
+        while True:
+            self.disyuntor.esperar()
+            self.limitador.adquirir()
+            inicio = time.perf_counter()
+            try:
+                traduccion = llamada()
+            except ErrorBackend as e:
+                self.metricas.registrar_peticion(time.perf_counter() - inicio, caracteres, type(e).__name__)
+                if isinstance(e, ErrorLimiteTasa):
+                    self.limitador.registrar_limite()
+                if not e.transitorio:
+                    raise
+                self.disyuntor.registrar_fallo()
+                intento += 1
+                if intento >= self.politica.max_intentos:
+                    raise
+                espera = self.politica.espera(intento)
+                self.metricas.incrementar('reintentos')
+                logger.info("Error transitorio (%s), reintento %d en %.1f s", e, intento, espera)
+                time.sleep(espera)
+                continue
+            except Exception as e:
+                self.metricas.registrar_peticion(time.perf_counter() - inicio, caracteres, type(e).__name__)
+                raise
+            self.metricas.registrar_peticion(time.perf_counter() - inicio, caracteres)
+            self.limitador.registrar_exito()
+            self.disyuntor.registrar_exito()
+            return traduccion
+    
+    def buscar_en_cache(self, texto):
+        if self.cache is None:
+            return None
+        traduccion = self.cache.obtener(self.idioma_origen, self.idioma_destino, texto)
+        self.metricas.incrementar('cache_aciertos' if traduccion is not None else 'cache_fallos')
+        return traduccion
+    
+    def buscar_en_memoria(self, texto):
+        if self.cache is None or not self.usar_memoria:
+            return None
+        traduccion = self.cache.buscar_similar(self.idioma_origen, self.idioma_destino, texto)
+        if traduccion is not None:
+            self.metricas.incrementar('memoria_aciertos')
+        return traduccion
+    
+    def guardar_en_cache(self, texto, traduccion):
+        if self.cache is not None and traduccion:
+            self.cache.guardar(self.idioma_origen, self.idioma_destino, texto, traduccion)
+    
+    def parsear_srt(self, contenido):
+        logger.debug("Parseando SRT, tamaño del contenido: %d caracteres", len(contenido))
+        subtitulos = self.parsear_archivo_srt(io.StringIO(contenido))
+        logger.debug("Subtítulos parseados: %d", len(subtitulos))
+        return subtitulos
+    
+    def _lineas_medidas(self, lineas, medida):
+        # Separa el tiempo de lectura y decodificación del de parseo; se suma en
+        # local y se anota en medida al terminar, sin el lock de Metricas por línea
+        reloj = time.perf_counter
+        lineas = iter(lineas)
+        total = 0.0
+        try:
+            while True:
+                inicio = reloj()
+                linea = next(lineas, None)
+                total += reloj() - inicio
+                if linea is None:
+                    return
+                yield linea
+        finally:
+            medida['decodificacion'] = total
+    
+    def parsear_archivo_srt(self, archivo):
+        self.errores_parseo = []
+        medida = {}
+        inicio = time.perf_counter()
+        subtitulos = list(iterar_srt(self._lineas_medidas(archivo, medida), self.errores_parseo))
+        segundos = time.perf_counter() - inicio
+        decodificacion = medida.get('decodificacion', 0.0)
+        self.metricas.sumar_tiempo('decodificacion', decodificacion)
+        self.metricas.sumar_tiempo('parseo', segundos - decodificacion)
+        self.metricas.incrementar('bloques_mal_formados', len(self.errores_parseo))
+        for error in self.errores_parseo:
+            logger.warning("Bloque mal formado en la línea %d: %s", error['linea'], error['motivo'])
+        return subtitulos
+    
+    def traducir_texto(self, texto, consultar_cache=True):
+        """Traduce un texto; devuelve None si no se pudo traducir.
+        
+        consultar_cache=False si quien llama ya lo buscó en la cache.
+        """
+        if not texto.strip():
+            return texto
+        
+        if consultar_cache:
+            en_cache = self.buscar_en_cache(texto)
+            if en_cache is not None:
+                return en_cache
+        
+        try:
+            if len(texto) > self.backend.max_caracteres:
+                raise ErrorTextoInvalido(f"{len(texto)} caracteres")
+            traduccion = self.pedir_traduccion(texto)
+        except ErrorTextoInvalido as e:
+            # Texto demasiado largo (o rechazado): partirlo en dos por el límite
+            # natural más cercano al centro en vez de ir línea por línea
+            partes = dividir_texto(texto)
+            if partes is None:
+                logger.warning("No se pudo traducir un texto de %d caracteres: %s", len(texto), e)
+                return None
+            self.metricas.incrementar('divisiones_adaptativas')
+            izquierda, separador, derecha = partes
+            traduccion_izquierda = self.traducir_texto(izquierda)
+            traduccion_derecha = self.traducir_texto(derecha)
+            if traduccion_izquierda is None or traduccion_derecha is None:
+                return None
+            return traduccion_izquierda + separador + traduccion_derecha
+        except ErrorBackend as e:
+            logger.warning("No se pudo traducir un texto de %d caracteres: %s", len(texto), e)
+            return None
+        except Exception:
+            logger.exception("Error en traducir_texto")
+            return None
+        
+        self.guardar_en_cache(texto, traduccion)
+        return traduccion
+    
+    def construir_lotes(self, textos):
+        """Agrupa índices de textos consecutivos sin superar max_caracteres_lote."""
+        lotes = []
+        lote_actual = []
+        tamano_actual = 0
+        
+        for i, texto in enumerate(textos):
+            if not texto.strip():
+                continue
+            tamano = len(texto) + len(self.backend.SEPARADOR_LOTE.format(len(lote_actual)))
+            if lote_actual and tamano_actual + tamano > self.max_caracteres_lote:
+                lotes.append(lote_actual)
+                lote_actual = []
+                tamano_actual = 0
+            lote_actual.append(i)
+            tamano_actual += tamano
+        
+        if lote_actual:
+            lotes.append(lote_actual)
+        return lotes
+    
+    def traducir_lote(self, textos):
+        # Los textos ya se buscaron en la cache al preparar el trabajo
+        if len(textos) == 1:
+            return [self.traducir_texto(textos[0], consultar_cache=False)]
+        
+        try:
+            # El backend decide cómo enviarlos juntos (por defecto, unidos con marcadores)
+            resultado = self.pedir_traducciones(textos)
+        except ErrorBackend as e:
+            if e.transitorio:
+                # Reintentos agotados: partir el lote solo multiplicaría las
+                # peticiones contra un servicio que ya está fallando
+                logger.warning("Lote de %d subtítulos sin traducir: %s", len(textos), e)
+                return [None] * len(textos)
+            logger.info("Error traduciendo lote de %d subtítulos: %s", len(textos), e)
+            resultado = None
+        
+        if resultado is not None:
+            for texto, traduccion in zip(textos, resultado):
+                self.guardar_en_cache(texto, traduccion)
+            return resultado
+        
+        # Lote desalineado o fallido: dividir a la mitad y reintentar
+        logger.debug("Lote de %d subtítulos desalineado, dividiendo a la mitad", len(textos))
+        self.metricas.incrementar('lotes_divididos')
+        mitad = len(textos) // 2
+        return self.traducir_lote(textos[:mitad]) + self.traducir_lote(textos[mitad:])
+    
+    def leer_subtitulos(self, archivo_entrada):
+        logger.debug("Parseando subtítulos de %s", archivo_entrada)
+        # Una sola pasada: la codificación se decide con los primeros bytes
+        info = {}
+        with open(archivo_entrada, 'rb') as f:
+            subtitulos = self.parsear_archivo_srt(leer_lineas(f, info))
+        if 'cambio_en_linea' in info:
+            logger.info("%s: bytes no UTF-8 en la línea %d, leído como cp1252 desde ahí",
+                        archivo_entrada, info['cambio_en_linea'])
+        else:
+            logger.debug("%s: codificación %s", archivo_entrada, info['codificacion'])
+        return subtitulos
+    
+    def cargar_version_anterior(self, origen_anterior, traduccion_anterior):
+        """Toma las traducciones de una versión anterior del archivo para reutilizarlas.
+        
+        Empareja cada subtítulo del original anterior con el de su traducción
+        por sus tiempos (o por posición si todos los tiempos cambiaron, p. ej.
+        por un desplazamiento, y tienen los mismos subtítulos) y las guarda por
+        texto, así se reconocen aunque cambien tiempos o numeración. Las frases
+        repartidas en varios subtítulos se guardan enteras, igual que se
+        buscarán en preparar_trabajo.
+        Devuelve cuántos textos distintos quedan disponibles.
+        """
+        originales = self.leer_subtitulos(origen_anterior)
+        traducidos = self.leer_subtitulos(traduccion_anterior)
+        por_tiempo = {(sub.inicio, sub.fin): sub for sub in traducidos}
+        traduccion_de = {i: por_tiempo[(sub.inicio, sub.fin)] for i, sub in enumerate(originales)
+                         if (sub.inicio, sub.fin) in por_tiempo}
+        if not traduccion_de and len(originales) == len(traducidos):
+            traduccion_de = dict(enumerate(traducidos))
+        elif len(traduccion_de) < len(originales):
+            logger.info("Versión anterior: %d de %d subtítulos sin traducción con los mismos tiempos",
+                        len(originales) - len(traduccion_de), len(originales))
+        
+        # Sin etiquetas y agrupados igual que los textos que se comparan en preparar_trabajo
+        textos, _, _ = self.textos_a_traducir(originales)
+        grupos = self.agrupar_frases(originales, textos) if self.agrupar else {}
+        miembros = {i for grupo in grupos.values() for i, *_ in grupo[1:]}
+        for i, texto_original in enumerate(textos):
+            if not texto_original or i in miembros:
+                continue
+            grupo = grupos.get(i, [(i, 0, 1, False, False)])
+            if any(j not in traduccion_de for j, *_ in grupo):
+                continue
+            partes = []
+            for j, _, _, suspensivos_inicio, suspensivos_fin in grupo:
+                parte = enmascarar(traduccion_de[j].texto)[0]
+                # Un texto igual al original es un subtítulo que no se llegó a traducir
+                if parte == enmascarar(originales[j].texto)[0]:
+                    break
+                if len(grupo) > 1:
+                    # Deshacer lo que añadió repartir_frase al repartirla
+                    if suspensivos_inicio:
+                        parte = self.PATRON_SUSPENSIVOS_INICIAL.sub('', parte)
+                    if suspensivos_fin:
+                        parte = self.PATRON_SUSPENSIVOS_FINAL.sub('', parte)
+                    parte = ' '.join(parte.split())
+                partes.append(parte)
+            else:
+                self.traducciones_previas[normalizar_texto(texto_original)] = ' '.join(partes)
+        logger.info("Versión anterior: %d traducciones reutilizables", len(self.traducciones_previas))
+        return len(self.traducciones_previas)
+    
+    def traducir_archivo(self, archivo_entrada, archivo_salida=None, anterior=None):
+        """anterior: (original anterior, su traducción) para traducir solo lo que cambió."""
+        if archivo_salida is None:
+            nombre_base = os.path.splitext(archivo_entrada)[0]
+            archivo_salida = f"{nombre_base}_traducido.srt"
+        
+        logger.debug("Traduciendo %s -> %s", archivo_entrada, archivo_salida)
+        
+        if anterior is not None:
+            self.cargar_version_anterior(*anterior)
+        subtitulos = self.leer_subtitulos(archivo_entrada)
+        return self.traducir_subtitulos(subtitulos, archivo_salida)
+    
+    def para_destino(self, idioma_destino, callback_progreso=None, idioma_origen=None,
+                     metricas=None):
+        """Traductor con la misma configuración y recursos compartidos para otro idioma."""
+        return TraductorSRT(
+            idioma_origen=idioma_origen or ('auto' if self.detectar_origen else self.idioma_origen),
+            idioma_destino=idioma_destino,
+            callback_progreso=callback_progreso,
+            usar_lotes=self.usar_lotes,
+            max_caracteres_lote=self.max_caracteres_lote,
+            cache=self.cache,
+            hilos=self.hilos,
+            limitador=self.limitador,
+            politica=self.politica,
+            disyuntor=self.disyuntor,
+            backend=self.backend,
+            reanudar=self.reanudar,
+            omitir=self.omitir,
+            metricas=metricas,
+            salida_progresiva=self.salida_progresiva,
+            agrupar_frases=self.agrupar,
+            usar_memoria=self.usar_memoria,
+            ajuste_tiempos=self.ajuste_tiempos,
+        )
+    
+    def muestra_representativa(self, subtitulos, cantidad=None):
+        """[(número, texto sin etiquetas)] repartidos por todo el archivo: al
+        principio suele haber créditos y canciones."""
+        cantidad = cantidad or self.MUESTRA_DETECCION
+        muestra = [(sub.numero, enmascarar(sub.texto)[0]) for sub in subtitulos]
+        muestra = [(numero, texto) for numero, texto in muestra
+                   if texto.strip() and not es_intraducible(texto, self.omitir)]
+        if len(muestra) > cantidad:
+            paso = len(muestra) / cantidad
+            muestra = [muestra[int(n * paso)] for n in range(cantidad)]
+        return muestra
+    
+    def detectar_idioma_origen(self, subtitulos, muestra=None):
+        muestra = muestra if muestra is not None else self.muestra_representativa(subtitulos)
+        if not muestra:
+            return None
+        with self.metricas.etapa('deteccion'):
+            return self.backend.detectar('\n'.join(texto for _, texto in muestra))
+    
+    def marcar_otro_idioma(self, muestra, origen):
+        """Números de los subtítulos de la muestra que están claramente en un
+        idioma distinto de origen.
+        
+        Solo se mira la muestra: detectar cada subtítulo del archivo tarda
+        tanto como traducirlo.
+        """
+        numeros = []
+        with self.metricas.etapa('deteccion'):
+            for numero, texto in muestra:
+                if sum(c.isalpha() for c in texto) < self.MIN_LETRAS_DETECCION:
+                    continue
+                idioma = self.backend.detectar(texto)
+                if idioma and not mismo_idioma(idioma, origen):
+                    numeros.append(numero)
+        if numeros:
+            logger.warning("%d subtítulos parecen no estar en '%s' (%s)", len(numeros), origen,
+                           ', '.join(str(numero) for numero in numeros[:20]))
+        return numeros
+    
+    def fijar_idioma_origen(self, subtitulos):
+        """Detecta el idioma origen del archivo si se pidió 'auto'.
+        
+        Devuelve (idioma origen, subtítulos en otro idioma). Si no se puede
+        detectar, las peticiones siguen con 'auto'.
+        """
+        if not self.detectar_origen:
+            return self.idioma_origen, []
+        muestra = self.muestra_representativa(subtitulos)
+        origen = self.detectar_idioma_origen(subtitulos, muestra)
+        if origen is None:
+            self.idioma_origen = 'auto'
+            logger.info("No se pudo detectar el idioma origen; lo detectará cada petición")
+            return 'auto', []
+        logger.info("Idioma origen detectado: %s", origen)
+        if mismo_idioma(origen, self.idioma_destino):
+            # El archivo no se va a traducir
+            self.idioma_origen = origen
+            return origen, []
+        otro_idioma = self.marcar_otro_idioma(muestra, origen)
+        # langdetect y el servicio no siempre escriben igual el código ('zh-cn' y
+        # 'zh-CN', 'he' e 'iw'); si el servicio no lo admite, que lo detecte él
+        codigo = self.backend.normalizar_idioma(origen)
+        if codigo is None:
+            logger.info("El backend no admite '%s' como origen; lo detectará cada petición", origen)
+            codigo = 'auto'
+        self.idioma_origen = codigo
+        return codigo, otro_idioma
+    
+    def traducir_archivo_multiple(self, archivo_entrada, destinos, archivos_salida=None,
+                                  callback_progreso=None):
+        """Traduce un archivo a varios idiomas leyéndolo y parseándolo una sola vez.
+        
+        Cada idioma se traduce en paralelo con su propio progreso
+        (callback_progreso(destino, actual, total, mensaje)) y sus propios errores.
+        Devuelve {destino: ruta de salida, None si el archivo ya está en ese
+        idioma, o excepción}.
+        """
+        logger.debug("Traduciendo %s -> %s", archivo_entrada, ', '.join(destinos))
+        subtitulos = self.leer_subtitulos(archivo_entrada)
+        
+        # Detectar el idioma origen una vez para todos los destinos
+        origen, otro_idioma = self.fijar_idioma_origen(subtitulos)
+        
+        if archivos_salida is None:
+            nombre_base = os.path.splitext(archivo_entrada)[0]
+            archivos_salida = {destino: f"{nombre_base}_traducido.{destino}.srt" for destino in destinos}
+        
+        def traducir_destino(destino):
+            callback = None
+            if callback_progreso:
+                callback = functools.partial(callback_progreso, destino)
+            traductor = self.para_destino(destino, callback, origen, Metricas())
+            # Cada destino trabaja sobre su propia copia de los subtítulos
+            copia = [sub.copiar() for sub in subtitulos]
+            ruta = traductor.traducir_subtitulos(copia, archivos_salida[destino])
+            estadisticas[destino] = traductor.estadisticas
+            metricas[destino] = traductor.metricas
+            return ruta
+        
+        resultados = {}
+        estadisticas = {}
+        metricas = {}
+        with ThreadPoolExecutor(max_workers=len(destinos) or 1) as executor:
+            futuros = {executor.submit(traducir_destino, destino): destino for destino in destinos}
+            for futuro in as_completed(futuros):
+                destino = futuros[futuro]
+                try:
+                    resultados[destino] = futuro.result()
+                except Exception as e:
+                    logger.error("Error traduciendo %s a %s: %s", archivo_entrada, destino, e)
+                    resultados[destino] = e
+        
+        for metricas_destino in metricas.values():
+            self.metricas.combinar(metricas_destino)
+        
+        self.total_subtitulos = len(subtitulos)
+        self.estadisticas = {'subtitulos': len(subtitulos), 'idioma_origen': origen,
+                             'otro_idioma': otro_idioma, 'por_destino': estadisticas}
+        for clave in ('peticiones', 'peticiones_ahorradas'):
+            self.estadisticas[clave] = sum(e.get(clave, 0) for e in estadisticas.values())
+        return {destino: resultados[destino] for destino in destinos}
+    
+    def textos_a_traducir(self, subtitulos):
+        """(textos limpios, etiquetas quitadas, cuántos se omiten) de subtitulos.
+        
+        Las etiquetas de formato no se envían: se traduce el texto limpio y se
+        vuelven a poner al terminar, así <i>Hola</i> y Hola comparten traducción.
+        Los que no tienen nada que traducir quedan vacíos.
+        """
+        textos = []
+        marcas = {}
+        omitidos = 0
+        for i, sub in enumerate(subtitulos):
+            limpio, marcas_subtitulo = enmascarar(sub.texto)
+            if not limpio.strip():
+                limpio = ''
+            elif es_intraducible(limpio, self.omitir):
+                limpio = ''
+                omitidos += 1
+            elif marcas_subtitulo:
+                marcas[i] = marcas_subtitulo
+            textos.append(limpio)
+        return textos, marcas, omitidos
+    
+    def preparar_trabajo(self, subtitulos, archivo_salida):
+        """Deja listo un archivo para traducir: deduplica, consulta la cache y el
+        diario, y agrupa lo que falta en unidades (lotes o subtítulos sueltos)."""
+        total = len(subtitulos)
+        self.total_subtitulos = total
+        inicio = time.perf_counter()
+        logger.debug("Total de subtítulos a traducir: %d", total)
+        
+        if self.callback_progreso:
+            self.callback_progreso(0, total, "Iniciando...")
+        
+        origen, otro_idioma = self.fijar_idioma_origen(subtitulos)
+        if mismo_idioma(origen, self.idioma_destino):
+            logger.info("%s: los subtítulos ya están en '%s', no se traduce", archivo_salida, origen)
+            self.estadisticas = {'subtitulos': total, 'idioma_origen': origen, 'ya_en_destino': True,
+                                 'peticiones': 0, 'peticiones_ahorradas': 0}
+            trabajo = TrabajoArchivo(subtitulos, archivo_salida, [], [], {}, None)
+            trabajo.ya_en_destino = True
+            trabajo.completados = total
+            trabajo.inicio = time.perf_counter()
+            return trabajo
+        
+        pendientes, marcas, omitidos = self.textos_a_traducir(subtitulos)
+        
+        # Una frase repartida en varios subtítulos seguidos se traduce entera. Se
+        # agrupa antes de reutilizar nada: el trozo de una frase no vale en otra, así
+        # que versión anterior, repeticiones, cache y diario van por frase entera
+        grupos = self.agrupar_frases(subtitulos, pendientes) if self.agrupar else {}
+        
+        # Los que no cambiaron respecto a la versión anterior conservan su traducción
+        reutilizados = 0
+        if self.traducciones_previas:
+            for i, texto in enumerate(pendientes):
+                if texto.strip():
+                    previa = self.traducciones_previas.get(normalizar_texto(texto))
+                    if previa is not None:
+                        subtitulos[i].texto = previa
+                        pendientes[i] = ''
+                        reutilizados += 1
+        
+        # Cada texto distinto se traduce una sola vez y se copia a sus repeticiones.
+        # Una frase agrupada solo repite otra partida igual, y se copia trozo a trozo
+        primera_aparicion = {}
+        copias = {}
+        for i, texto in enumerate(pendientes):
+            if not texto:
+                continue
+            grupo = grupos.get(i)
+            particion = tuple(tuple(miembro[1:]) for miembro in grupo) if grupo else None
+            clave = (normalizar_texto(texto), particion)
+            original = primera_aparicion.get(clave)
+            if original is None:
+                primera_aparicion[clave] = i
+                continue
+            pendientes[i] = ''
+            if grupo:
+                del grupos[i]
+                for (j, *_), (k, *_) in zip(grupo, grupos[original]):
+                    copias[j] = k
+            else:
+                copias[i] = original
+        agrupados = sum(len(grupo) - 1 for grupo in grupos.values())
+        
+        # Los textos ya traducidos en la cache no se envían al traductor
+        en_cache_total = 0
+        for i, texto in enumerate(pendientes):
+            if texto.strip():
+                en_cache = self.buscar_en_cache(texto)
+                if en_cache is not None:
+                    subtitulos[i].texto = en_cache
+                    pendientes[i] = ''
+                    en_cache_total += 1
+        
+        # Lo casi igual a algo ya traducido (otra puntuación, un nombre, un número...)
+        # reutiliza esa traducción adaptada
+        en_memoria = 0
+        with self.metricas.etapa('memoria'):
+            for i, texto in enumerate(pendientes):
+                if texto:
+                    similar = self.buscar_en_memoria(texto)
+                    if similar is not None:
+                        subtitulos[i].texto = similar
+                        pendientes[i] = ''
+                        en_memoria += 1
+        
+        # Recuperar lo traducido en una ejecución anterior que no llegó al final
+        diario = None
+        if self.reanudar:
+            diario = DiarioProgreso(archivo_salida + self.EXTENSION_DIARIO,
+                                    self.idioma_origen, self.idioma_destino)
+            recuperadas = diario.cargar(pendientes)
+            for i, traduccion in recuperadas.items():
+                subtitulos[i].texto = traduccion
+                pendientes[i] = ''
+            if recuperadas:
+                logger.info("Reanudando: %d subtítulos recuperados del diario", len(recuperadas))
+            diario.abrir()
+        
+        if self.usar_lotes:
+            unidades = self.construir_lotes(pendientes)
+        else:
+            unidades = [[i] for i, texto in enumerate(pendientes) if texto.strip()]
+        
+        self.estadisticas = {
+            'subtitulos': total,
+            'idioma_origen': origen,
+            'otro_idioma': otro_idioma,
+            'duplicados': len(copias),
+            'omitidos': omitidos,
+            'en_cache': en_cache_total,
+            'en_memoria': en_memoria,
+            'reutilizados': reutilizados,
+            'frases_agrupadas': len(grupos),
+            'peticiones': len(unidades),
+            # Sin deduplicar, omitir ni agrupar, cada uno habría ido en su propia petición
+            'peticiones_ahorradas': len(copias) + omitidos + agrupados,
+        }
+        self.metricas.incrementar('subtitulos', total)
+        self.metricas.incrementar('duplicados', len(copias))
+        self.metricas.incrementar('omitidos', omitidos)
+        self.metricas.incrementar('reutilizados', reutilizados)
+        self.metricas.incrementar('subtitulos_con_etiquetas', len(marcas))
+        self.metricas.incrementar('frases_agrupadas', len(grupos))
+        self.metricas.incrementar('subtitulos_agrupados', agrupados)
+        logger.debug("Peticiones a traducir: %d (%d duplicados y %d omitidos no se envían)",
+                     len(unidades), len(copias), omitidos)
+        
+        trabajo = TrabajoArchivo(subtitulos, archivo_salida, pendientes, unidades, copias, diario)
+        trabajo.marcas = marcas
+        trabajo.grupos = grupos
+        trabajo.miembro_de = {i: primero for primero, grupo in grupos.items() for i, *_ in grupo[1:]}
+        trabajo.completados = total - sum(len(unidad) for unidad in unidades)
+        if self.ajuste_tiempos is not None:
+            trabajo.tiempos = self.ajuste_tiempos.tiempos_base(subtitulos)
+        ahora = time.perf_counter()
+        self.metricas.sumar_tiempo('preparacion', ahora - inicio)
+        trabajo.inicio = ahora
+        if self.salida_progresiva:
+            trabajo.escritor = EscritorSRT(archivo_salida)
+            # Lo ya resuelto al principio del archivo se puede escribir desde ya
+            self._escribir_listos(trabajo)
+        return trabajo
+    
+    def _completar_subtitulo(self, trabajo, i):
+        # Último paso de cada subtítulo: copiar la traducción del original si era
+        # una repetición y volver a poner sus etiquetas de formato
+        sub = trabajo.subtitulos[i]
+        original = trabajo.copias.get(i)
+        if original is not None:
+            # Si el original falló, la repetición conserva su propio texto
+            sub.fallido = trabajo.subtitulos[original].fallido
+            if not sub.fallido:
+                sub.texto = trabajo.textos_traducidos[original]
+        primero = trabajo.miembro_de.get(i)
+        if primero is not None:
+            # La parte de la frase que le tocó al repartirla
+            sub.fallido = trabajo.subtitulos[primero].fallido
+            if not sub.fallido:
+                sub.texto = trabajo.fragmentos.pop(i)
+        if not sub.fallido:
+            grupo = trabajo.grupos.get(i)
+            if grupo:
+                for (j, *_), fragmento in zip(grupo, self.repartir_frase(sub.texto, grupo)):
+                    trabajo.fragmentos[j] = fragmento
+                sub.texto = trabajo.fragmentos.pop(i)
+            # Las repeticiones reciben solo su parte si el original abre una frase
+            if i in trabajo.originales:
+                trabajo.textos_traducidos[i] = sub.texto
+            marcas = trabajo.marcas.get(i)
+            if marcas:
+                sub.texto = restaurar(sub.texto, marcas)
+    
+    def _escribir_listos(self, trabajo):
+        # Avanza en orden mientras el siguiente subtítulo ya no espera traducción;
+        # el original de una repetición siempre va antes que ella
+        inicio = time.perf_counter()
+        subtitulos = trabajo.subtitulos
+        desde = trabajo.escritos
+        while trabajo.escritos < len(subtitulos) and trabajo.escritos not in trabajo.en_curso:
+            self._completar_subtitulo(trabajo, trabajo.escritos)
+            trabajo.escritos += 1
+        # Los tiempos del tramo se ajustan con su traducción ya completa
+        if trabajo.tiempos is not None:
+            self.ajuste_tiempos.aplicar(trabajo.tiempos, subtitulos, desde, trabajo.escritos)
+        if trabajo.escritor is not None:
+            for i in range(desde, trabajo.escritos):
+                trabajo.escritor.escribir(subtitulos[i])
+        self.metricas.sumar_tiempo('escritura', time.perf_counter() - inicio)
+    
+    def _continua_frase(self, anterior, siguiente, hueco):
+        if hueco > self.HUECO_MAXIMO_FRASE:
+            return False
+        if self.PATRON_DIALOGO.search(anterior) or self.PATRON_DIALOGO.search(siguiente):
+            return False
+        if self.PATRON_SUSPENSIVOS_FINAL.search(anterior):
+            # "I don't think we..." sigue en "...should go" o en "should go"
+            return bool(self.PATRON_SUSPENSIVOS_INICIAL.match(siguiente)) or siguiente[:1].islower()
+        return not self.PATRON_FIN_FRASE.search(anterior)
+    
+    def agrupar_frases(self, subtitulos, pendientes):
+        """Agrupa los subtítulos seguidos que forman una misma frase.
+        
+        Se guían por la puntuación final y la pausa entre subtítulos. El texto
+        de cada grupo se une en pendientes[primero] y los demás quedan vacíos.
+        Devuelve {primero: [(índice, longitud, líneas, suspensivos al inicio,
+        suspensivos al final)]}; los suspensivos de unión se quitan al unir y se
+        vuelven a poner al repartir.
+        """
+        grupos = {}
+        grupo = []
+        
+        def cerrar():
+            if len(grupo) > 1:
+                miembros = []
+                partes = []
+                for n, i in enumerate(grupo):
+                    texto = ' '.join(pendientes[i].split())
+                    inicio = n > 0 and bool(self.PATRON_SUSPENSIVOS_INICIAL.match(texto))
+                    fin = n < len(grupo) - 1 and bool(self.PATRON_SUSPENSIVOS_FINAL.search(texto))
+                    texto = self.PATRON_SUSPENSIVOS_INICIAL.sub('', texto) if inicio else texto
+                    texto = self.PATRON_SUSPENSIVOS_FINAL.sub('', texto) if fin else texto
+                    miembros.append((i, len(texto), pendientes[i].count('\n') + 1, inicio, fin))
+                    partes.append(texto)
+                    pendientes[i] = ''
+                pendientes[grupo[0]] = ' '.join(partes)
+                grupos[grupo[0]] = miembros
+            grupo.clear()
+        
+        longitud = 0
+        for i, texto in enumerate(pendientes):
+            if not texto:
+                cerrar()
+                continue
+            if (grupo and grupo[-1] == i - 1 and len(grupo) < self.MAX_SUBTITULOS_FRASE
+                    and longitud + len(texto) < self.MAX_CARACTERES_FRASE
+                    and self._continua_frase(pendientes[i - 1], texto,
+                                             subtitulos[i].inicio - subtitulos[i - 1].fin)):
+                grupo.append(i)
+                longitud += len(texto) + 1
+            else:
+                cerrar()
+                grupo.append(i)
+                longitud = len(texto)
+        cerrar()
+        return grupos
+    
+    def repartir_frase(self, traduccion, grupo):
+        """Reparte la traducción de una frase agrupada entre sus subtítulos."""
+        fragmentos = repartir_texto(traduccion, [longitud for _, longitud, _, _, _ in grupo])
+        resultado = []
+        for (_, _, lineas, inicio, fin), fragmento in zip(grupo, fragmentos):
+            if lineas > 1:
+                # Conserva el número de líneas del original si hay palabras para ello
+                fragmento = '\n'.join(linea for linea in repartir_texto(fragmento, [1] * lineas) if linea)
+            if fin:
+                fragmento += '...'
+            if inicio:
+                fragmento = '...' + fragmento
+            resultado.append(fragmento)
+        return resultado
+    
+    def textos_unidad(self, trabajo, unidad):
+        return [trabajo.pendientes[i] for i in unidad]
+    
+    def registrar_resultado(self, trabajo, unidad, traducciones):
+        """Coloca en su sitio las traducciones de una unidad terminada."""
+        subtitulos = trabajo.subtitulos
+        # Cada subtítulo se actualiza en su sitio, sin copiar la lista
+        for i, texto_traducido in zip(unidad, traducciones):
+            if texto_traducido is None:
+                # Conserva el original y queda fuera del diario para reintentarlo
+                subtitulos[i].fallido = True
+                continue
+            subtitulos[i].texto = texto_traducido
+            if trabajo.diario is not None:
+                trabajo.diario.registrar(i, trabajo.pendientes[i], texto_traducido)
+        trabajo.en_curso.difference_update(unidad)
+        trabajo.completados += len(unidad)
+        trabajo.restantes -= 1
+        if trabajo.escritor is not None:
+            self._escribir_listos(trabajo)
+        
+        if self.callback_progreso:
+            total = len(subtitulos)
+            self.callback_progreso(trabajo.completados, total, f"Traduciendo {trabajo.completados}/{total}")
+    
+    def finalizar_trabajo(self, trabajo):
+        """Completa los duplicados y escribe el archivo de salida.
+        
+        Devuelve la ruta de salida, o None si el archivo ya estaba en el idioma destino.
+        """
+        subtitulos = trabajo.subtitulos
+        total = len(subtitulos)
+        if trabajo.ya_en_destino:
+            self.estadisticas['fallidos'] = []
+            if self.callback_progreso:
+                self.callback_progreso(total, total, "Ya está en el idioma destino")
+            return None
+        trabajo.cerrar_diario()
+        # Sin salida progresiva aquí se completan todos; con ella, solo los que falten
+        self._escribir_listos(trabajo)
+        
+        numeros_fallidos = [sub.numero for sub in subtitulos if sub.fallido]
+        self.estadisticas['fallidos'] = numeros_fallidos
+        self.metricas.incrementar('subtitulos_fallidos', len(numeros_fallidos))
+        
+        if self.callback_progreso and not trabajo.unidades:
+            self.callback_progreso(total, total, f"Traduciendo {total}/{total}")
+        
+        self.metricas.sumar_tiempo('traduccion', time.perf_counter() - trabajo.inicio)
+        
+        archivo_salida = trabajo.archivo_salida
+        if trabajo.escritor is not None:
+            trabajo.cerrar_escritor()
+        else:
+            with self.metricas.etapa('escritura'):
+                guardar_srt_atomico(archivo_salida, subtitulos)
+        if numeros_fallidos:
+            # El diario se conserva: la próxima ejecución solo pedirá los fallidos
+            logger.warning("%s: %d subtítulos sin traducir (%s)", archivo_salida, len(numeros_fallidos),
+                           ', '.join(str(numero) for numero in numeros_fallidos[:20]))
+        elif trabajo.diario is not None:
+            trabajo.diario.eliminar()
+        
+        logger.info("Archivo traducido guardado: %s", archivo_salida)
+        return archivo_salida
+    
+    def traducir_subtitulos(self, subtitulos, archivo_salida):
+        trabajo = self.preparar_trabajo(subtitulos, archivo_salida)
+        
+        # Varias peticiones en vuelo a la vez; cada resultado se coloca en su
+        # índice, así el orden de salida no depende del orden de llegada
+        try:
+            with ThreadPoolExecutor(max_workers=self.hilos) as executor:
+                futuros = {
+                    executor.submit(self.traducir_lote, self.textos_unidad(trabajo, unidad)): unidad
+                    for unidad in trabajo.unidades
+                }
+                for futuro in as_completed(futuros):
+                    self.registrar_resultado(trabajo, futuros[futuro], futuro.result())
+        except BaseException:
+            trabajo.cerrar_escritor()
+            raise
+        finally:
+            trabajo.cerrar_diario()
+        
+        return self.finalizar_trabajo(trabajo)
+
+
+SUFIJO_SALIDA = '_traducido'
+PATRON_IDIOMA = re.compile(r'^(auto|[a-z]{2,3}(-[A-Za-z]{2,4})?)$')
+
+# Backend, cache y limitador de cada proceso del pool, creados una sola vez
+_contexto_proceso = {}
+
+
+def es_codigo_idioma(valor):
+    return bool(PATRON_IDIOMA.match(valor)) and not os.path.exists(valor)
+
+
+def conversion_fps(valor):
+    # '23.976:25' -> (23.976, 25.0)
+    try:
+        origen, destino = (float(parte.replace(',', '.')) for parte in valor.split(':'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"se esperaba ORIGEN:DESTINO, p. ej. 23.976:25, no '{valor}'")
+    if origen <= 0 or destino <= 0:
+        raise argparse.ArgumentTypeError("los fps deben ser positivos")
+    return origen, destino
+
+
+def ruta_salida(archivo_entrada, directorio_salida=None, sufijo=SUFIJO_SALIDA):
+    nombre_base, extension = os.path.splitext(os.path.basename(archivo_entrada))
+    directorio = directorio_salida or os.path.dirname(archivo_entrada)
+    return os.path.join(directorio, f"{nombre_base}{sufijo}{extension or '.srt'}")
+
+
+def buscar_archivos(entradas, sufijo=SUFIJO_SALIDA, sin_coincidencias=None):
+    """Expande archivos, directorios (recursivamente) y patrones glob.
+
+    Omite las salidas de ejecuciones anteriores y los duplicados,
+    conservando el orden en que aparecen. Si se pasa la lista
+    sin_coincidencias, se añaden a ella las entradas que no corresponden a
+    ningún archivo.
+    """
+    encontrados = []
+    vistos = set()
+
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            candidatos = sorted(glob.glob(os.path.join(entrada, '**', '*.srt'), recursive=True))
+        elif os.path.isfile(entrada):
+            candidatos = [entrada]
+        else:
+            candidatos = sorted(glob.glob(entrada, recursive=True))
+        if sin_coincidencias is not None and not any(os.path.isfile(c) for c in candidatos):
+            sin_coincidencias.append(entrada)
+
+        for candidato in candidatos:
+            if not os.path.isfile(candidato):
+                continue
+            # nombre_traducido.srt o, con varios destinos, nombre_traducido.es.srt
+            nombre = os.path.splitext(os.path.basename(candidato))[0]
+            if re.search(re.escape(sufijo) + r'(\.[\w-]+)?$', nombre):
+                continue
+            clave = os.path.abspath(candidato)
+            if clave not in vistos:
+                vistos.add(clave)
+                encontrados.append(candidato)
+
+    return encontrados
+
+
+def configurar_log(nivel):
+    logging.basicConfig(
+        level=getattr(logging, nivel.upper(), logging.WARNING),
+        format='%(asctime)s %(processName)s %(levelname)s %(name)s: %(message)s',
+    )
+
+
+def _iniciar_proceso(opciones):
+    configurar_log(opciones['nivel_log'])
+    if opciones['backend'] == 'simulado':
+        backend = BackendSimulado(latencia=opciones['latencia_simulada'])
+    else:
+        backend = BackendGoogle(transporte=transporte_compartido(
+            tamano_pool=opciones['conexiones'] or opciones['hilos'],
+            timeout_conexion=opciones['timeout_conexion'],
+            timeout_lectura=opciones['timeout'],
+        ))
+    _contexto_proceso['backend'] = backend
+    # El límite global se reparte entre los procesos del pool
+    _contexto_proceso['limitador'] = LimitadorTasa(tasa=opciones['tasa'] / opciones['procesos'])
+    _contexto_proceso['disyuntor'] = Disyuntor()
+    _contexto_proceso['cache'] = (
+        CacheTraducciones(opciones['cache']) if opciones['cache'] else None
+    )
+    _contexto_proceso['opciones'] = opciones
+
+
+def version_anterior(archivo_entrada, archivo_salida, directorio_anterior):
+    """(original anterior, traducción anterior) de una entrega revisada, o None.
+
+    Los dos son los archivos del mismo nombre que la entrada y la salida en
+    directorio_anterior. La salida actual no sirve: tras una primera ejecución
+    ya es la traducción del original nuevo, no del anterior.
+    """
+    if not directorio_anterior:
+        return None
+    origen_anterior = os.path.join(directorio_anterior, os.path.basename(archivo_entrada))
+    traduccion_anterior = os.path.join(directorio_anterior, os.path.basename(archivo_salida))
+    if not (os.path.exists(origen_anterior) and os.path.exists(traduccion_anterior)):
+        logger.info("%s: sin versión anterior, se traduce completo", archivo_entrada)
+        return None
+    return origen_anterior, traduccion_anterior
+
+
+def _traducir_en_proceso(archivo_entrada, archivo_salida):
+    opciones = _contexto_proceso['opciones']
+    destinos = opciones['destinos']
+    traductor = TraductorSRT(
+        idioma_origen=opciones['origen'],
+        idioma_destino=destinos[0],
+        usar_lotes=opciones['usar_lotes'],
+        cache=_contexto_proceso['cache'],
+        hilos=opciones['hilos'],
+        limitador=_contexto_proceso['limitador'],
+        disyuntor=_contexto_proceso['disyuntor'],
+        backend=_contexto_proceso['backend'],
+        omitir=opciones['omitir'],
+        salida_progresiva=opciones['salida_progresiva'],
+        agrupar_frases=opciones['agrupar_frases'],
+        usar_memoria=opciones['usar_memoria'],
+        ajuste_tiempos=opciones['ajuste_tiempos'],
+    )
+
+    inicio = time.perf_counter()
+    if len(destinos) == 1:
+        traductor.traducir_archivo(archivo_entrada, archivo_salida,
+                                   version_anterior(archivo_entrada, archivo_salida, opciones['anterior']))
+    else:
+        base, extension = os.path.splitext(archivo_salida)
+        salidas = {destino: f"{base}.{destino}{extension}" for destino in destinos}
+        resultados = traductor.traducir_archivo_multiple(archivo_entrada, destinos, salidas)
+        errores = [f"{destino}: {error}" for destino, error in resultados.items()
+                   if isinstance(error, Exception)]
+        if errores:
+            raise RuntimeError('; '.join(errores))
+
+    metricas = traductor.metricas.resumen()
+    return {
+        'subtitulos': traductor.total_subtitulos,
+        'idioma_origen': traductor.estadisticas.get('idioma_origen', traductor.idioma_origen),
+        'ya_en_destino': traductor.estadisticas.get('ya_en_destino', False),
+        'fallidos': metricas['contadores'].get('subtitulos_fallidos', 0),
+        'peticiones_ahorradas': traductor.estadisticas.get('peticiones_ahorradas', 0),
+        'segundos': time.perf_counter() - inicio,
+        'metricas': metricas,
+    }
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(
+        description="Traduce archivos de subtítulos SRT sin interfaz gráfica."
+    )
+    parser.add_argument('entradas', nargs='+',
+                        help="archivos .srt, directorios o patrones glob; "
+                             "para compatibilidad se aceptan también 'origen destino' al final")
+    parser.add_argument('-o', '--origen', default=None, help="idioma origen (por defecto: auto)")
+    parser.add_argument('-d', '--destino', default=None,
+                        help="idioma destino (por defecto: es); varios separados por comas, "
+                             "p. ej. es,fr,de, para traducir cada archivo a todos en una pasada")
+    parser.add_argument('--salida-dir', help="directorio donde escribir las traducciones")
+    parser.add_argument('--sufijo', default=SUFIJO_SALIDA,
+                        help=f"sufijo del archivo traducido (por defecto: {SUFIJO_SALIDA})")
+    parser.add_argument('-p', '--procesos', type=int, default=os.cpu_count() or 1,
+                        help="archivos traducidos en paralelo")
+    parser.add_argument('--hilos', type=int, default=4, help="peticiones en vuelo por archivo")
+    parser.add_argument('--tasa', type=float, default=5.0,
+                        help="peticiones por segundo entre todos los procesos")
+    parser.add_argument('--conexiones', type=int, default=None,
+                        help="conexiones HTTP persistentes por proceso (por defecto: igual que --hilos)")
+    parser.add_argument('--timeout-conexion', type=float, default=5.0,
+                        help="segundos para establecer una conexión con el servicio")
+    parser.add_argument('--timeout', type=float, default=20.0,
+                        help="segundos de espera de cada respuesta del servicio")
+    parser.add_argument('--sin-lotes', action='store_true', help="una petición por subtítulo")
+    parser.add_argument('--cache', default=RUTA_CACHE_PREDETERMINADA, help="ruta de la cache SQLite")
+    parser.add_argument('--sin-cache', action='store_true', help="no usar la cache de traducciones")
+    parser.add_argument('--sin-memoria', action='store_true',
+                        help="no reutilizar la traducción de un subtítulo que solo cambia en números, "
+                             "nombres, puntuación o mayúsculas")
+    parser.add_argument('--omitir', metavar='ARCHIVO',
+                        help="archivo con textos que no se traducen, uno por línea")
+    parser.add_argument('--sin-frases', action='store_true',
+                        help="no agrupar las frases que continúan en el subtítulo siguiente")
+    parser.add_argument('--salida-progresiva', action='store_true',
+                        help="escribir cada subtítulo en cuanto él y los anteriores están traducidos "
+                             "(el archivo de salida se puede ir leyendo mientras tanto)")
+    parser.add_argument('--anterior', metavar='DIR',
+                        help="directorio con la versión anterior de los originales y de sus "
+                             "traducciones (mismos nombres): solo se traducen los subtítulos "
+                             "nuevos o modificados (con un único destino)")
+    tiempos = parser.add_argument_group('ajustes de tiempos (se aplican al escribir la traducción)')
+    tiempos.add_argument('--desplazar', type=int, default=0, metavar='MS',
+                         help="sumar MS milisegundos a todos los tiempos (negativo adelanta)")
+    tiempos.add_argument('--fps', type=conversion_fps, metavar='ORIGEN:DESTINO',
+                         help="cambiar la velocidad de fotogramas, p. ej. 23.976:25")
+    tiempos.add_argument('--duracion-minima', type=int, default=0, metavar='MS',
+                         help="alargar los subtítulos más cortos, sin pisar el siguiente")
+    tiempos.add_argument('--cps', type=float, metavar='N',
+                         help="caracteres por segundo de lectura: alargar los subtítulos cuya "
+                              "traducción no da tiempo a leer, sin pisar el siguiente")
+    tiempos.add_argument('--separacion', type=int, default=0, metavar='MS',
+                         help="pausa mínima hasta el subtítulo siguiente al alargar o recortar")
+    tiempos.add_argument('--corregir-solapes', action='store_true',
+                         help="recortar los subtítulos que terminan después de empezar el siguiente")
+    parser.add_argument('--backend', choices=('google', 'simulado'), default='google')
+    parser.add_argument('--latencia-simulada', type=float, default=0.05,
+                        help="latencia por petición del backend simulado (s)")
+    parser.add_argument('--nivel-log', default='WARNING',
+                        choices=('DEBUG', 'INFO', 'WARNING', 'ERROR'),
+                        help="nivel de los mensajes del traductor (por defecto: WARNING)")
+    parser.add_argument('-v', '--detallado', action='store_true', help="equivale a --nivel-log DEBUG")
+    parser.add_argument('--metricas', metavar='ARCHIVO',
+                        help="escribir en JSON las métricas de cada archivo y de toda la ejecución")
+    return parser
+
+
+def main(argv=None):
+    parser = crear_parser()
+    args = parser.parse_args(argv)
+    nivel_log = 'DEBUG' if args.detallado else args.nivel_log
+    configurar_log(nivel_log)
+
+    # Forma clásica: traductor_srt.py archivo.srt [origen] destino
+    entradas = list(args.entradas)
+    idiomas = []
+    while len(entradas) > 1 and len(idiomas) < 2 and es_codigo_idioma(entradas[-1]):
+        idiomas.insert(0, entradas.pop())
+    if len(idiomas) == 2:
+        origen, destino = idiomas
+    elif len(idiomas) == 1:
+        origen, destino = 'auto', idiomas[0]
+    else:
+        origen, destino = 'auto', 'es'
+    origen = args.origen or origen
+    destino = args.destino or destino
+
+    sin_coincidencias = []
+    archivos = buscar_archivos(entradas, args.sufijo, sin_coincidencias)
+    for entrada in sin_coincidencias:
+        # p. ej. una ruta mal escrita, o "en fr,de" en lugar de --destino fr,de
+        print(f"No se encontró ningún archivo para '{entrada}'", file=sys.stderr)
+    if not archivos:
+        print("No se encontraron archivos SRT para traducir", file=sys.stderr)
+        return 2
+
+    if args.salida_dir:
+        os.makedirs(args.salida_dir, exist_ok=True)
+
+    omitir = []
+    if args.omitir:
+        with open(args.omitir, 'r', encoding='utf-8') as f:
+            omitir = [linea.strip() for linea in f if linea.strip()]
+
+    procesos = max(1, min(args.procesos, len(archivos)))
+    destinos = [codigo.strip() for codigo in destino.split(',') if codigo.strip()]
+    if args.anterior and len(destinos) > 1:
+        parser.error("--anterior solo admite un idioma destino")
+    opciones = {
+        'origen': origen,
+        'destinos': destinos,
+        'usar_lotes': not args.sin_lotes,
+        'hilos': args.hilos,
+        'conexiones': args.conexiones,
+        'timeout_conexion': args.timeout_conexion,
+        'timeout': args.timeout,
+        'tasa': args.tasa,
+        'procesos': procesos,
+        'cache': None if args.sin_cache else args.cache,
+        'backend': args.backend,
+        'latencia_simulada': args.latencia_simulada,
+        'nivel_log': nivel_log,
+        'omitir': omitir,
+        'anterior': args.anterior,
+        'salida_progresiva': args.salida_progresiva,
+        'agrupar_frases': not args.sin_frases,
+        'usar_memoria': not args.sin_memoria,
+        'ajuste_tiempos': AjusteTiempos(
+            desplazamiento=args.desplazar,
+            fps_origen=args.fps[0] if args.fps else None,
+            fps_destino=args.fps[1] if args.fps else None,
+            duracion_minima=args.duracion_minima,
+            caracteres_por_segundo=args.cps,
+            separacion_minima=args.separacion,
+            corregir_solapes=args.corregir_solapes,
+        ),
+    }
+
+    print(f"Traduciendo {len(archivos)} archivo(s) {origen} -> {', '.join(destinos)} "
+          f"con {procesos} proceso(s)")
+    inicio = time.perf_counter()
+    total_subtitulos = 0
+    total_ahorradas = 0
+    total_sin_traducir = 0
+    fallidos = 0
+    metricas_total = Metricas()
+    metricas_archivos = {}
+
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso,
+                             initargs=(opciones,)) as executor:
+        futuros = {
+            executor.submit(_traducir_en_proceso, archivo,
+                            ruta_salida(archivo, args.salida_dir, args.sufijo)): archivo
+            for archivo in archivos
+        }
+        for n, futuro in enumerate(as_completed(futuros), 1):
+            archivo = futuros[futuro]
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                fallidos += 1
+                print(f"[{n}/{len(archivos)}] ERROR {archivo}: {e}", file=sys.stderr)
+                continue
+            total_subtitulos += resultado['subtitulos']
+            total_ahorradas += resultado['peticiones_ahorradas']
+            total_sin_traducir += resultado['fallidos']
+            metricas_total.combinar(resultado['metricas'])
+            metricas_archivos[archivo] = dict(resultado['metricas'], segundos=resultado['segundos'],
+                                              idioma_origen=resultado['idioma_origen'])
+            if resultado['ya_en_destino']:
+                print(f"[{n}/{len(archivos)}] {archivo}: ya está en '{resultado['idioma_origen']}', "
+                      f"no se traduce")
+                continue
+            aviso = f", {resultado['fallidos']} SIN TRADUCIR" if resultado['fallidos'] else ""
+            print(f"[{n}/{len(archivos)}] {archivo} ({resultado['idioma_origen']}): "
+                  f"{resultado['subtitulos']} subtítulos en {resultado['segundos']:.1f} s{aviso}")
+
+    segundos = time.perf_counter() - inicio
+    velocidad = total_subtitulos / segundos if segundos else 0.0
+    print(f"Completado: {len(archivos) - fallidos}/{len(archivos)} archivos, "
+          f"{total_subtitulos} subtítulos en {segundos:.1f} s ({velocidad:.1f} subtítulos/s), "
+          f"{total_ahorradas} sin enviar por repetidos u omitidos")
+    if total_sin_traducir:
+        print(f"{total_sin_traducir} subtítulos quedaron sin traducir; vuelve a ejecutar "
+              f"el mismo comando para reintentar solo esos", file=sys.stderr)
+
+    if args.metricas:
+        with open(args.metricas, 'w', encoding='utf-8') as f:
+            json.dump({
+                'ejecucion': dict(
+                    metricas_total.resumen(),
+                    archivos=len(archivos),
+                    fallidos=fallidos,
+                    segundos=segundos,
+                    subtitulos_por_segundo=velocidad,
+                ),
+                'archivos': metricas_archivos,
+            }, f, indent=2, ensure_ascii=False)
+
+    # Una entrada que no encontró archivos cuenta como fallo
+    return 1 if fallidos or total_sin_traducir or sin_coincidencias else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
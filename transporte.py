@@ -0,0 +1,83 @@
+"""
+Transporte HTTP compartido
+Una única sesión de requests con un pool de conexiones persistentes (keep-alive)
+que reutilizan todos los traductores y todos los hilos del proceso: para los
+textos cortos que se envían, abrir una conexión TCP + TLS por petición cuesta
+más que la propia traducción
+"""
+
+import logging
+import threading
+
+
+logger = logging.getLogger('traductor_srt')
+
+
+class TransporteHTTP:
+    def __init__(self, tamano_pool=10, timeout_conexion=5.0, timeout_lectura=20.0):
+        # Importación diferida, como deep_translator en BackendGoogle
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.tamano_pool = tamano_pool
+        self.timeout = (timeout_conexion, timeout_lectura)
+        self.sesion = requests.Session()
+        # pool_block: con más hilos que conexiones, los que sobran esperan una
+        # conexión libre en lugar de abrir otra que se tira al terminar
+        adaptador = HTTPAdapter(pool_connections=tamano_pool, pool_maxsize=tamano_pool,
+                                pool_block=True)
+        self.sesion.mount('https://', adaptador)
+        self.sesion.mount('http://', adaptador)
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.sesion.get(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.sesion.post(url, **kwargs)
+
+    def cerrar(self):
+        self.sesion.close()
+
+
+class _RequestsSobreTransporte:
+    """Sustituye al módulo requests en deep_translator: mismas funciones, pero
+    get y post van por el transporte compartido."""
+
+    def __init__(self, requests, transporte):
+        self._requests = requests
+        self._transporte = transporte
+
+    def get(self, url, **kwargs):
+        return self._transporte.get(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self._transporte.post(url, **kwargs)
+
+    def __getattr__(self, nombre):
+        return getattr(self._requests, nombre)
+
+
+_compartido = None
+_lock = threading.Lock()
+
+
+def transporte_compartido(**configuracion):
+    """Transporte del proceso; la configuración solo se aplica al crearlo."""
+    global _compartido
+    with _lock:
+        if _compartido is None:
+            _compartido = TransporteHTTP(**configuracion)
+        elif configuracion:
+            logger.debug("El transporte HTTP ya existe; se ignora la nueva configuración")
+        return _compartido
+
+
+def instalar_en_deep_translator(transporte):
+    # deep_translator llama a requests.get del módulo en cada traducción, lo que
+    # abre una conexión nueva cada vez; no admite una sesión propia
+    import requests
+    from deep_translator import google
+
+    google.requests = _RequestsSobreTransporte(requests, transporte)